@@ -0,0 +1,75 @@
+# ***************************************************************************
+# *   Copyright (c) 2021 Sebastian Ernesto García <sebasg@outlook.com>      *
+# *                                                                         *
+# *   doubleHelical.py                                                      *
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Lesser General Public License for more details.                   *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+# Double helical solid with the middle plane faces filtered by CenterOfMass (previous construction)
+# against the construction that never makes them. Run it with FreeCADCmd from the repository folder:
+#     FreeCADCmd benchmarks/doubleHelical.py
+
+import sys
+import os
+from time import perf_counter
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import FreeCAD as App
+from Part import makeHelix, makeSolid, makeShell
+from numpy import pi
+from freecad.invgears.gears import inputDataClass
+from freecad.invgears.profileCache import getGears
+from freecad.invgears.functions import getWire, doublehelicalextrusion
+
+
+def filteredDoublehelicalextrusion(wire, height, angle, vPos=App.Vector(0, 0, 0), orientation=0):
+    direction = bool(angle < 0)
+    first_spine = makeHelix((height / 2) * (2 * pi / abs(angle)), height / 2, height, 0, direction)
+    first_spine.Placement = App.Placement(vPos, App.Rotation(App.Vector(0, 0, 1), 0))
+    wire.Placement = App.Placement(vPos, App.Rotation(App.Vector(0, 0, 1), orientation))
+    first_solid = first_spine.makePipeShell([wire], True, True)
+    second_solid = first_solid.mirror(App.Vector(0, 0, vPos.z + height / 2), App.Vector(0, 0, 1))
+    faces = first_solid.Faces + second_solid.Faces
+    faces = [f for f in faces if not (abs(f.CenterOfMass.z - (vPos.z + height / 2)) < 0.001)]
+    solid = makeSolid(makeShell(faces))
+    return solid
+
+
+def measure(build, wire, height, angle, repeat=3):
+    best = None
+    for i in range(repeat):
+        start = perf_counter()
+        solid = build(wire.copy(), height, angle)
+        elapsed = perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, solid
+
+
+for N in (20, 50, 100, 200):
+    inputData = inputDataClass(2.0, 20.0, N, 20, 0.1, 0.25, 0.0, 0.0, 0.0, 0.0, 20, 0.25)
+    cD, master, slave = getGears(inputData)
+    wire = getWire(master)
+    height = 10.0
+    angle = 0.5 * (2 * pi / N)
+    t_old, solid_old = measure(filteredDoublehelicalextrusion, wire, height, angle)
+    t_new, solid_new = measure(doublehelicalextrusion, wire, height, angle)
+    print("N = {:3d}  filtered {:7.3f} s  by construction {:7.3f} s  faces {} / {}  volume {:.4f} / {:.4f}  valid {}".format(
+        N, t_old, t_new, len(solid_old.Faces), len(solid_new.Faces), solid_old.Volume, solid_new.Volume, solid_new.isValid()))
@@ -0,0 +1,73 @@
+# ***************************************************************************
+# *   Copyright (c) 2021 Sebastian Ernesto García <sebasg@outlook.com>      *
+# *                                                                         *
+# *   internalGear.py                                                       *
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Lesser General Public License for more details.                   *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+
+# Checks the internal gear profiles with different clearance and addendum for the ring and the pinion
+# against the two passes they are defined by: the ring solved with the master values for both gears and
+# the pinion with the slave values for both. It does not need FreeCAD:
+#     python benchmarks/internalGear.py
+
+import sys
+import os
+from dataclasses import replace
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from freecad.invgears.gears import inputDataClass, commonData, gearData, mainCalculations, getProfile
+from freecad.invgears.profileCache import getGears
+
+tolerance = 1e-9
+
+
+def toothPoints(gear):
+    return np.hstack(gear.tooth_profile[:6])
+
+
+def twoPasses(inputData):
+    cD, ring, pinion = commonData(), gearData(), gearData()
+    mainCalculations(replace(inputData, c_slave=inputData.c, addendum_slave=inputData.addendum), cD, ring, pinion, True)
+    getProfile(ring, pinion, cD, True)
+    ringPoints = toothPoints(ring)
+    values = replace(inputData, c=inputData.c_slave, addendum=inputData.addendum_slave)
+    cD, ring, pinion = commonData(), gearData(), gearData()
+    mainCalculations(values, cD, ring, pinion, True)
+    getProfile(pinion, ring, cD)
+    return ringPoints, toothPoints(pinion)
+
+
+cases = [
+    # m, phi_s, N_m, N_s, Bl, c, c_slave, addendum, addendum_slave
+    (2.0, 20.0, 60, 20, 0.0, 0.4, 0.25, 1.0, 1.0),
+    (2.0, 20.0, 60, 20, 0.0, 0.25, 0.25, 1.2, 0.9),
+    (1.5, 20.0, 48, 17, 0.05, 0.4, 0.2, 1.1, 0.95),
+    (1.0, 25.0, 80, 30, 0.0, 0.1, 0.5, 0.9, 1.1),
+]
+for m, phi_s, N_m, N_s, Bl, c, c_slave, addendum, addendum_slave in cases:
+    inputData = inputDataClass(m, phi_s, N_m, N_s, Bl, c, 0.0, 0.0, 0.0, 0.0, 30, 0.5, addendum, c_slave, addendum_slave)
+    cD, ring, pinion = getGears(inputData, True)
+    expected = twoPasses(inputData)
+    error = max(np.abs(toothPoints(gear) - points).max() for gear, points in zip((ring, pinion), expected))
+    print("N = {}/{} c = {}/{} addendum = {}/{}  largest difference {:.2e}".format(N_m, N_s, c, c_slave, addendum, addendum_slave, error))
+    assert error <= tolerance * m, "internal gear profiles differ from their two passes"
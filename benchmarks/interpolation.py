@@ -0,0 +1,85 @@
+# ***************************************************************************
+# *   Copyright (c) 2021 Sebastian Ernesto García <sebasg@outlook.com>      *
+# *                                                                         *
+# *   interpolation.py                                                      *
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Lesser General Public License for more details.                   *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+
+# Checks that the interpolated B-splines pass through the profile points and times the collocation
+# solve, with scipy and with numpy alone. It does not need FreeCAD:
+#     python benchmarks/interpolation.py
+
+import sys
+import os
+from time import perf_counter
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from freecad.invgears import bspline
+from freecad.invgears.gears import inputDataClass
+from freecad.invgears.gears_bevel import inputDataClass_b
+from freecad.invgears.profileCache import getGears
+
+# distance from the curve to its points, relative to the size of the point set
+tolerance = 1e-9
+
+
+def interpolationError(points):
+    poles, knots, degree, u = bspline.interpolate(points)
+    size = max(np.ptp(points, axis=1).max(), 1.0)
+    return np.abs(bspline.evaluate(poles, knots, degree, u) - points).max() / size
+
+
+def measure(points, repeat=20):
+    start = perf_counter()
+    for i in range(repeat):
+        bspline.interpolate(points)
+    return (perf_counter() - start) / repeat
+
+
+segments = []
+for n in (5, 20, 50, 200):
+    cD, master, slave = getGears(inputDataClass(1.0, 20.0, 30, 20, 0.1, 0.25, 0.0, 0.0, 0.1, 0.0, n, 0.25))
+    segments.extend(master.tooth_profile + slave.tooth_profile)
+    cD, master, slave = getGears(inputDataClass_b(1.0, 20.0, 30, 20, 0.1, 5.0, 90.0, 0.25, 0.0, n, 0.25), bevel=True)
+    segments.extend(master.tooth_profile + slave.tooth_profile)
+segments.extend(segment[:, :k] for segment in segments[:4] for k in (2, 3, 4))
+
+solvers = [("numpy", None)]
+if bspline.solve_banded is not None:
+    solvers.insert(0, ("scipy", bspline.solve_banded))
+
+installed = bspline.solve_banded
+try:
+    for name, solver in solvers:
+        bspline.solve_banded = solver
+        error = max(interpolationError(points) for points in segments)
+        print("{} {} segments, largest error {:.2e}".format(name, len(segments), error))
+        assert error <= tolerance, "the interpolated curve misses its points"
+        line = name
+        for n in (20, 100, 400):
+            t = np.linspace(0.0, 3.0, n)
+            points = np.vstack([np.cos(t) * (1 + t), np.sin(t) * (1 + t), t**2])
+            line = line + "  n = {} {:.3f} ms".format(n, measure(points) * 1e3)
+        print(line)
+finally:
+    bspline.solve_banded = installed
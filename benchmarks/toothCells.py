@@ -0,0 +1,75 @@
+# ***************************************************************************
+# *   Copyright (c) 2021 Sebastian Ernesto García <sebasg@outlook.com>      *
+# *                                                                         *
+# *   toothCells.py                                                         *
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Lesser General Public License for more details.                   *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+
+# Spur and bevel solids built from the whole profile wire against one tooth cell replicated around the
+# axis, as a compound and fused. Run it with FreeCADCmd from the repository folder:
+#     FreeCADCmd benchmarks/toothCells.py
+
+import sys
+import os
+from time import perf_counter
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from freecad.invgears.gears import inputDataClass
+from freecad.invgears.gears_bevel import inputDataClass_b
+from freecad.invgears.profileCache import getGears
+from freecad.invgears.functions import getWire, commonextrusion, getCellWire, polarCopies, buildBevelSolid, buildBevelCell
+
+
+def measure(build, repeat=3):
+    best = None
+    for i in range(repeat):
+        start = perf_counter()
+        solid = build()
+        elapsed = perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, solid
+
+
+def report(name, N, results):
+    line = "{} N = {:3d}".format(name, N)
+    for label, (elapsed, solid) in results:
+        line = line + "  {} {:7.3f} s ({:.4f})".format(label, elapsed, solid.Volume)
+    print(line)
+
+
+height = 10.0
+for N in (50, 100, 200, 400):
+    inputData = inputDataClass(1.0, 20.0, N, 20, 0.1, 0.25, 0.0, 0.0, 0.0, 0.0, 20, 0.25)
+    cD, master, slave = getGears(inputData)
+    wire = getWire(master)
+    report("spur ", N, [
+        ("wire", measure(lambda: commonextrusion(wire.copy(), height))),
+        ("cells", measure(lambda: polarCopies(commonextrusion(getCellWire(wire, N), height), N))),
+        ("fused", measure(lambda: polarCopies(commonextrusion(getCellWire(wire, N), height), N, True), 1))])
+
+for N in (50, 100, 200):
+    inputData = inputDataClass_b(1.0, 20.0, N, 20, 0.1, height, 90.0, 0.25, 0.0, 20, 0.25)
+    cD, master, slave = getGears(inputData, bevel=True)
+    report("bevel", N, [
+        ("wire", measure(lambda: buildBevelSolid(master, cD.lambda_, height))),
+        ("cells", measure(lambda: polarCopies(buildBevelCell(master, cD.lambda_, height), N))),
+        ("fused", measure(lambda: polarCopies(buildBevelCell(master, cD.lambda_, height), N, True), 1))])
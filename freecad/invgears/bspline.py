@@ -0,0 +1,126 @@
+# ***************************************************************************
+# *   Copyright (c) 2021 Sebastian Ernesto García <sebasg@outlook.com>      *
+# *                                                                         *
+# *   bspline.py                                                            *
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Lesser General Public License for more details.                   *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+# Global B-spline interpolation of the profile points without FreeCAD (The NURBS Book, section 9.2.1).
+# Parameters by chord length and knots by averaging, so the collocation matrix is banded and totally
+# positive and it is never singular. points are (dim, n) arrays like the profile segments.
+
+from numpy import zeros, ones, concatenate, cumsum, diff, searchsorted, clip, arange, minimum, maximum, newaxis, unique
+from numpy.linalg import norm, solve
+
+try:
+    from scipy.linalg import solve_banded
+except ImportError:
+    solve_banded = None
+
+
+def chordParameters(points):
+    d = norm(diff(points, axis=1), axis=0)
+    u = concatenate(([0.0], cumsum(d)))
+    return u / u[-1]
+
+
+def averagedKnots(u, degree):
+    n = u.size
+    s = concatenate(([0.0], cumsum(u[1:-1])))
+    inner = (s[degree:n - 1] - s[:n - 1 - degree]) / degree
+    return concatenate((zeros(degree + 1), inner, ones(degree + 1)))
+
+
+def basisFunctions(knots, degree, u):
+    # nonzero basis functions at every u, N[k, i] is the function span[k] - degree + i
+    span = clip(searchsorted(knots, u, side='right') - 1, degree, knots.size - degree - 2)
+    N = zeros((u.size, degree + 1))
+    N[:, 0] = 1.0
+    left = zeros((u.size, degree + 1))
+    right = zeros((u.size, degree + 1))
+    for j in range(1, degree + 1):
+        left[:, j] = u - knots[span + 1 - j]
+        right[:, j] = knots[span + j] - u
+        saved = 0.0
+        for r in range(j):
+            temp = N[:, r] / (right[:, r + 1] + left[:, j - r])
+            N[:, r] = saved + right[:, r + 1] * temp
+            saved = left[:, j - r] * temp
+        N[:, j] = saved
+    return span, N
+
+
+def solveBanded(span, N, degree, b):
+    # row k of the matrix has N[k] from column span[k] - degree. Every column of b is solved at once by
+    # LAPACK, as a band matrix when scipy is installed and otherwise as a full one, a curve segment has
+    # at most a few hundred points
+    n = span.size
+    p = degree
+    if solve_banded is None:
+        A = zeros((n, n))
+        A[arange(n)[:, newaxis], (span - p)[:, newaxis] + arange(p + 1)] = N
+        return solve(A, b)
+    # scipy keeps the element (k, c) of the matrix in ab[p + k - c, c]
+    ab = zeros((2 * p + 1, n))
+    rows = arange(n)[:, newaxis]
+    columns = (span - p)[:, newaxis] + arange(p + 1)
+    ab[p + rows - columns, columns] = N
+    return solve_banded((p, p), ab, b)
+
+
+def interpolate(points, degree=3):
+    # poles, knots and degree of the curve through points, u are the parameters of the points
+    degree = min(degree, points.shape[1] - 1)
+    u = chordParameters(points)
+    knots = averagedKnots(u, degree)
+    span, N = basisFunctions(knots, degree, u)
+    poles = solveBanded(span, N, degree, points.T).T
+    return poles, knots, degree, u
+
+
+def polesMultsKnots(points, degree=3):
+    # arguments of BSplineCurve.buildFromPolesMultsKnots for the curve through points, poles as a list of tuples
+    poles, knots, degree, u = interpolate(points, degree)
+    knots, mults = unique(knots, return_counts=True)
+    return list(map(tuple, poles.T.tolist())), mults.tolist(), knots.tolist(), degree
+
+
+def evaluate(poles, knots, degree, u):
+    span, N = basisFunctions(knots, degree, u)
+    index = span[:, newaxis] - degree + arange(degree + 1)
+    return (poles[:, index] * N).sum(axis=-1)
+
+
+def derivative(poles, knots, degree):
+    dpoles = degree * diff(poles, axis=1) / (knots[degree + 1:-1] - knots[1:-degree - 1])
+    return dpoles, knots[1:-1], degree - 1
+
+
+def deviation(points, midpoints, iterations=4):
+    # distance from midpoints[:, k] to the interpolated curve between points k and k + 1
+    poles, knots, degree, u = interpolate(points)
+    dpoles, dknots, ddegree = derivative(poles, knots, degree)
+    a = u[:-1]
+    b = u[1:]
+    t = (a + b) / 2
+    for i in range(iterations):
+        D = evaluate(poles, knots, degree, t) - midpoints
+        dC = evaluate(dpoles, dknots, ddegree, t)
+        t = minimum(maximum(t - (D * dC).sum(axis=0) / (dC**2).sum(axis=0), a), b)
+    return norm(evaluate(poles, knots, degree, t) - midpoints, axis=0)
@@ -0,0 +1,201 @@
+# ***************************************************************************
+# *   Copyright (c) 2021 Sebastian Ernesto García <sebasg@outlook.com>      *
+# *                                                                         *
+# *   controller.py                                                         *
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Lesser General Public License for more details.                   *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+
+import FreeCAD as App
+from numpy import array, radians, degrees, cos, sin
+from freecad.invgears.gearTrain import gearTrain
+from freecad.invgears.functions import getPartFromFPMaster, getPartFromFPSlave, getPartFromFPBevelMaster, getPartFromFPBevelSlave
+from freecad.invgears.properties import setChanged
+
+
+class ViewProviderGearTrainController():
+    def __init__(self, obj):
+        obj.Proxy = self
+
+    def attach(self, vobj):
+        self.vobj = vobj
+
+    def getIcon(self):
+        return ":/icons/master_gear.svg"
+
+    def __getstate__(self):
+        return None
+
+    def __setstate__(self, state):
+        return None
+
+
+class GearTrainController():
+    # places the parts of every slave gear of the document, level by level of the gear train
+
+    def __init__(self, obj):
+        self.Type = 'gearTrainController'
+        obj.Proxy = self
+
+        obj.addProperty('App::PropertyLinkListGlobal', 'Gears', 'Gear train', 'Slave gears placed by the controller')
+        obj.addProperty('App::PropertyLinkListGlobal', 'Parts', 'Gear train', 'Parts read or placed by the controller')
+
+    def execute(self, obj):
+        placeTrain(obj.Document, obj.Gears)
+
+
+def getController(doc):
+    for obj in doc.Objects:
+        if getattr(getattr(obj, 'Proxy', None), 'Type', None) == 'gearTrainController':
+            return obj
+    obj = doc.addObject('App::FeaturePython', 'GearTrain')
+    GearTrainController(obj)
+    if App.GuiUp:
+        ViewProviderGearTrainController(obj.ViewObject)
+    return obj
+
+
+def addToController(fp, fp_master):
+    # the part of fp is placed by the controller instead of expressions. Its Placement is an output so
+    # the controller writes it without touching the part
+    controller = getController(fp.Document)
+    if fp.Proxy.Type == 'slaveBevelGear':
+        part_master = getPartFromFPBevelMaster(fp_master)
+        part_slave = getPartFromFPBevelSlave(fp)
+    else:
+        part_master = getPartFromFPMaster(fp_master)
+        part_slave = getPartFromFPSlave(fp)
+    part_slave.setPropertyStatus('Placement', 'Output')
+    controller.Gears = controller.Gears + [fp]
+    controller.Parts = controller.Parts + [part for part in (part_master, part_slave) if part not in controller.Parts]
+
+
+def slavePlacements(x, y, z, Center_d, beta, phase, masterRotation, relation, sense):
+    # positions and rotations (deg) of the slaves around their masters, sense is -1 for internal masters
+    position = radians(beta + phase)
+    angle = beta + phase + sense * (phase - masterRotation) * relation
+    return x + Center_d * cos(position), y + Center_d * sin(position), z, angle
+
+
+def bevelRotations(beta, phase, masterRotation, relation, Sigma):
+    # quaternions (x, y, z, w) of Rz(gamma) Ry(Sigma) Rz(theta), the slave turned theta around its axis,
+    # tilted Sigma and moved gamma around the master axis. Angles in degrees
+    theta = radians((phase - masterRotation) * relation) / 2
+    sigma = radians(Sigma) / 2
+    gamma = radians(beta + phase) / 2
+    s1, c1 = sin(theta), cos(theta)
+    s2, c2 = sin(sigma), cos(sigma)
+    s3, c3 = sin(gamma), cos(gamma)
+    x = s1 * s2 * c3 - c1 * s2 * s3
+    y = s1 * s2 * s3 + c1 * s2 * c3
+    z = c1 * c2 * s3 + s1 * c2 * c3
+    w = c1 * c2 * c3 - s1 * c2 * s3
+    return x, y, z, w
+
+
+def placeTrain(doc, fps):
+    # state of every gear that drives others: base of its part, rotation of its part (deg), sum of the
+    # angular positions of the slave-master chain and relation to the first master
+    controlled = set(fp.Name for fp in fps)
+    train = gearTrain(doc)
+    state = {}
+    for level in train.levels():
+        slaves = []
+        for name in level:
+            fp = train.features[name]
+            if fp.Proxy.Type in ('masterGear', 'internalGear'):
+                part = getPartFromFPMaster(fp)
+                base = part.Placement.Base
+                state[name] = (base.x, base.y, base.z, part.masterRotation.Value, 0.0, 1.0)
+            elif fp.Proxy.Type == 'masterBevelGear':
+                part = getPartFromFPBevelMaster(fp)
+                base = part.Placement.Base
+                state[name] = (base.x, base.y, base.z, part.masterRotation.Value, 0.0, 1.0)
+            elif name in controlled and train.parents.get(name) in state:
+                slaves.append(fp)
+            elif fp.Proxy.Type == 'slaveMasterGear' and train.parents.get(name) in state:
+                # placed by expressions, only its state is needed
+                part = getPartFromFPSlave(fp)
+                placement = part.Placement
+                angle = degrees(placement.Rotation.Angle) * (1 if placement.Rotation.Axis.z >= 0 else -1)
+                state[name] = (placement.Base.x, placement.Base.y, placement.Base.z, angle) + chainState(fp, state)
+        bevelSlaves = [fp for fp in slaves if fp.Proxy.Type == 'slaveBevelGear']
+        slaves = [fp for fp in slaves if fp.Proxy.Type != 'slaveBevelGear']
+        if slaves:
+            placeLevel(slaves, state)
+        if bevelSlaves:
+            placeBevelLevel(bevelSlaves, state)
+
+
+def chainState(fp, state):
+    fp_master = fp.fp_master
+    x, y, z, masterRotation, chain, global_relation = state[fp_master.Name]
+    chain = fp.beta.Value + getPartFromFPMaster(fp_master).slaveAngularPosition.Value + chain
+    return chain, global_relation * fp_master.N_m / fp_master.N_s
+
+
+def placeLevel(slaves, state):
+    rows = []
+    for fp in slaves:
+        fp_master = fp.fp_master
+        x, y, z, masterRotation, chain, global_relation = state[fp_master.Name]
+        if fp_master.Proxy.Type == 'slaveMasterGear':
+            hseparator = fp_master.hseparator.Value
+            if hseparator < 0.0:
+                z = z + hseparator - fp_master.thickness.Value
+            else:
+                z = z + hseparator + fp_master.fp_master.thickness.Value
+        sense = -1.0 if fp_master.Proxy.Type == 'internalGear' else 1.0
+        phase = getPartFromFPMaster(fp_master).slaveAngularPosition.Value + chain
+        rows.append((x, y, z, fp_master.Center_d.Value, fp.beta.Value, phase, masterRotation, fp_master.N_m / fp_master.N_s, sense))
+
+    xp, yp, zp, angle = slavePlacements(*array(rows).T)
+
+    for k, fp in enumerate(slaves):
+        relation = rows[k][7]
+        part = getPartFromFPSlave(fp)
+        part.Placement = App.Placement(App.Vector(xp[k], yp[k], zp[k]), App.Rotation(App.Vector(0, 0, 1), angle[k]))
+        setChanged(part, 'relation', relation)
+        setChanged(part, 'global_relation', relation * state[fp.fp_master.Name][5])
+        if fp.Proxy.Type == 'slaveMasterGear':
+            state[fp.Name] = (xp[k], yp[k], zp[k], angle[k]) + chainState(fp, state)
+
+
+def placeBevelLevel(slaves, state):
+    rows = []
+    for fp in slaves:
+        fp_master = fp.fp_master
+        x, y, z, masterRotation, chain, global_relation = state[fp_master.Name]
+        phase = getPartFromFPBevelMaster(fp_master).slaveAngularPosition.Value
+        rows.append((fp.beta.Value, phase, masterRotation, fp_master.N_m / fp_master.N_s, fp_master.Sigma.Value, fp_master.lambda_.Value, x, y, z))
+    beta, phase, masterRotation, relation, Sigma, lambda_, x, y, z = array(rows).T
+
+    qx, qy, qz, qw = bevelRotations(beta, phase, masterRotation, relation, Sigma)
+    gamma = radians(beta + phase)
+    xPos = lambda_ * cos(gamma) * sin(radians(Sigma))
+    yPos = lambda_ * sin(gamma) * sin(radians(Sigma))
+    theta = (phase - masterRotation) * relation
+
+    for k, fp in enumerate(slaves):
+        part = getPartFromFPBevelSlave(fp)
+        part.Placement = App.Placement(App.Vector(x[k], y[k], z[k]), App.Rotation(qx[k], qy[k], qz[k], qw[k]))
+        setChanged(part, 'relation', relation[k])
+        setChanged(part, 'rotationAxis', theta[k])
+        setChanged(part, 'xPos', xPos[k])
+        setChanged(part, 'yPos', yPos[k])
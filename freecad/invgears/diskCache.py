@@ -0,0 +1,124 @@
+# ***************************************************************************
+# *   Copyright (c) 2021 Sebastian Ernesto García <sebasg@outlook.com>      *
+# *                                                                         *
+# *   diskCache.py                                                          *
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Lesser General Public License for more details.                   *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+# Content addressed cache of the generated shapes in BREP files, so documents that are opened again
+# or recomputed without changes read their solids instead of sweeping them. The settings are in
+# User parameter:BaseApp/Preferences/Mod/InvGears: CacheDirectory and CacheSize in MB, 0 disables it.
+# The command Involute Gears > Clear shapes cache removes the saved shapes.
+
+import os
+from hashlib import sha1
+
+import FreeCAD as App
+from Part import makeCompound, read
+from freecad.invgears.version import __version__
+
+
+def getParameters():
+    return App.ParamGet("User parameter:BaseApp/Preferences/Mod/InvGears")
+
+
+def cacheDirectory():
+    directory = getParameters().GetString("CacheDirectory", "")
+    if directory == "":
+        directory = os.path.join(App.getUserAppDataDir(), "InvGears", "cache")
+    return directory
+
+
+def cacheSize():
+    return getParameters().GetInt("CacheSize", 256) * 2**20
+
+
+# version of the shape construction, increase it with every change in how the wires or solids are built,
+# so the shapes cached by the previous construction are never read
+shapeVersion = 1
+
+
+def shapeKey(*keys):
+    # the release and the construction version are part of the key, shapes of older releases or
+    # constructions are never read
+    return sha1(repr((__version__, shapeVersion) + keys).encode()).hexdigest()
+
+
+def loadShapes(key):
+    # list of the shapes saved with key or None
+    if cacheSize() <= 0:
+        return None
+    filename = os.path.join(cacheDirectory(), key + ".brep")
+    if not os.path.isfile(filename):
+        return None
+    try:
+        compound = read(filename)
+    except Exception:
+        return None
+    # an empty or truncated file is rebuilt by the caller
+    shapes = compound.childShapes()
+    if len(shapes) == 0 or any(shape.isNull() for shape in shapes):
+        return None
+    os.utime(filename)
+    return shapes
+
+
+def saveShapes(key, shapes):
+    maxSize = cacheSize()
+    if maxSize <= 0:
+        return
+    directory = cacheDirectory()
+    try:
+        os.makedirs(directory, exist_ok=True)
+        filename = os.path.join(directory, key + ".brep")
+        # written with another name and renamed, so a file is never read half written
+        temporary = filename + ".tmp"
+        makeCompound(shapes).exportBrep(temporary)
+        os.replace(temporary, filename)
+        evict(directory, maxSize)
+    except OSError as error:
+        App.Console.PrintWarning("InvGears: shapes cache not saved. {}\n".format(error))
+
+
+def storedShape(key, build):
+    # the shape saved with key, or build() saved for the next time
+    shapes = loadShapes(key)
+    if shapes is None:
+        shapes = [build()]
+        saveShapes(key, shapes)
+    return shapes[0]
+
+
+def evict(directory, maxSize):
+    # removes the least recently used files until the cache fits in maxSize
+    files = [os.path.join(directory, name) for name in os.listdir(directory) if name.endswith(".brep")]
+    files = sorted(files, key=os.path.getmtime)
+    size = sum(os.path.getsize(name) for name in files)
+    while size > maxSize and len(files) > 1:
+        name = files.pop(0)
+        size = size - os.path.getsize(name)
+        os.remove(name)
+
+
+def clearShapes():
+    directory = cacheDirectory()
+    if os.path.isdir(directory):
+        for name in os.listdir(directory):
+            if name.endswith(".brep"):
+                os.remove(os.path.join(directory, name))
@@ -21,16 +21,17 @@
 # *                                                                         *
 # ***************************************************************************
 
-import FreeCAD as App
-from Part import Face, makeShell, makeSolid, makeCylinder
-from freecad.invgears.gears import inputDataClass, commonData, gearData, mainCalculations, getProfile
-from freecad.invgears.gears_bevel import inputDataClass_b, commonData_b, gearData_b, mainCalculations_b, getProfile_b
-from freecad.invgears.functions import getWire, getBevelWire, getMasterShape, getSlaveShape, getInternalShape, getBevelShape, commonextrusion, updatePosition
-from freecad.invgears.properties import loadProperties, addMasterProperties, addSlaveProperties, addAdditionalProperties
-from freecad.invgears.expressions import slavePartExpressions, slaveBevelPartExpressions
+from freecad.invgears.gears import inputDataClass
+from freecad.invgears.profileCache import getGears
+from freecad.invgears.functions import getWire, getBevelWire, getMasterShape, getSlaveShape, getInternalShape, getBevelShape, getStackedShape, updatePosition
+from freecad.invgears.functions import inputProperties, parametersKey, getBevelInputData
+from freecad.invgears.diskCache import shapeKey, loadShapes, saveShapes
+from freecad.invgears.properties import loadProperties, setWire, addMasterProperties, addSlaveProperties, addAdditionalProperties
+from freecad.invgears.properties import restoreMasterProperties
+from freecad.invgears.controller import addToController
 from freecad.invgears.functions import getPartFromFPSlave, getPartFromFPBevelSlave
-
-from numpy import pi
+from freecad.invgears.stages import MATH, PROFILE, WIRE, SOLID, ALL
+from freecad.invgears.stages import masterStages, internalStages, masterBevelStages, slaveStages, slaveMasterStages
 
 
 class ViewProviderMasterGear():
@@ -54,35 +55,41 @@ class MasterGear():
 
     def __init__(self, fp, form):
         self.Type = 'masterGear'
+        self.dirty = ALL
         fp.Proxy = self
 
         addMasterProperties(fp, form[0], form[1])
 
-    def execute(self, fp):
-        inputData = inputDataClass(fp.m.Value, fp.phi_s.Value, fp.N_m, fp.N_s, fp.Bl.Value, fp.c, fp.deltaCs.Value, fp.deltatp.Value, fp.offset_m.Value, fp.offset_s.Value, fp.n, fp.iL,fp.addendum_master)
-        cD = commonData()
-        master = gearData()
-        slave = gearData()
-
-        mainCalculations(inputData, cD, master, slave)
-
-        getProfile(master, slave, cD)
-        
-        inputData = inputDataClass(fp.m.Value, fp.phi_s.Value, fp.N_m, fp.N_s, fp.Bl.Value, fp.c_slave, fp.deltaCs.Value, fp.deltatp.Value, fp.offset_m.Value, fp.offset_s.Value, fp.n, fp.iL,fp.addendum_slave)
-        mainCalculations(inputData, cD, master, slave)
-
-        getProfile(slave, master, cD)
+    def onChanged(self, fp, prop):
+        self.dirty = getattr(self, 'dirty', ALL) | masterStages.get(prop, 0)
 
-        loadProperties(fp, cD, master, slave)
+    def onDocumentRestored(self, fp):
+        restoreMasterProperties(fp)
 
-        W_m = getWire(master)
-        Solid_m = getMasterShape(fp, W_m)
-        fp.Shape = Solid_m
+    def execute(self, fp):
+        dirty = getattr(self, 'dirty', ALL)
+        if dirty & (MATH | PROFILE):
+            cD, master, slave = getGears(self.inputData(fp))
+            loadProperties(fp, cD, master, slave)
 
-        W_s = getWire(slave)
-        fp.W_s = W_s
+        if dirty & (WIRE | SOLID):
+            key = shapeKey(parametersKey(fp))
+            shapes = loadShapes(key)
+            if shapes is None:
+                cD, master, slave = getGears(self.inputData(fp))
+                W_m = getWire(master)
+                Solid_m = getMasterShape(fp, W_m)
+                W_s = getWire(slave)
+                shapes = [Solid_m, W_s]
+                saveShapes(key, shapes)
+            fp.Shape = shapes[0]
+            setWire(fp, shapes[1])
+        self.dirty = 0
         print("done")
 
+    def inputData(self, fp):
+        return inputDataClass(fp.m.Value, fp.phi_s.Value, fp.N_m, fp.N_s, fp.Bl.Value, fp.c, fp.deltaCs.Value, fp.deltatp.Value, fp.offset_m.Value, fp.offset_s.Value, fp.n, fp.iL, fp.addendum_master, fp.c_slave, fp.addendum_slave, fp.tolerance.Value)
+
 
 class ViewProviderSlaveGear():
     def __init__(self, obj):
@@ -112,24 +119,30 @@ class SlaveGear():
         part_slave = getPartFromFPSlave(fp)
         part_slave.addProperty('App::PropertyFloat', 'relation', 'Gear relation', 'Gear relation')
         part_slave.addProperty('App::PropertyFloat', 'global_relation', 'Gear relation', 'Gear relation from first master gear')
-        slavePartExpressions(fp, fp_master)
+        addToController(fp, fp_master)
+
+        self.dirty = ALL
+        self.masterKey = None
 
-        self.betaChanged = False
-    
     def onChanged(self, fp, prop):
-        if prop == "beta":
-            self.betaChanged = True
-        else:
-            self.betaChanged = False
+        self.dirty = getattr(self, 'dirty', ALL) | slaveStages.get(prop, 0)
 
     def execute(self, fp):
-        if self.betaChanged is False:
-            fp_master = fp.fp_master
+        # the master solid or wire changed when its parameters key did. The position also depends on the
+        # master body rotation and the chain above it, which are not in the key, so it is always updated
+        dirty = getattr(self, 'dirty', ALL)
+        fp_master = fp.fp_master
+        masterKey = parametersKey(fp_master)
+        if masterKey != getattr(self, 'masterKey', None):
+            dirty = dirty | SOLID
+
+        if dirty & SOLID:
             Solid_s = getSlaveShape(fp_master)
             fp.Shape = Solid_s
+            self.masterKey = masterKey
 
         updatePosition(fp)
-        self.betaChanged = False
+        self.dirty = 0
 
 
 class ViewProviderSlaveMasterGear():
@@ -164,107 +177,52 @@ class SlaveMasterGear():
         fp.addProperty('App::PropertyDistance', 'hseparator', '1 - Separator Parameters', 'Separator thickness').hseparator = form[1].doubleSpinBox.text()
         fp.addProperty('App::PropertyAngle', 'tita', '1 - Separator Parameters', 'Orientation offset').tita = form[1].doubleSpinBox_2.text()
 
-        addMasterProperties(fp, form[2], form[3])
+        addMasterProperties(fp, form[2], form[3], slaveOnly=True)
 
-        slavePartExpressions(fp, fp_master)
+        addToController(fp, fp_master)
 
-        self.betaChanged = False
+        self.dirty = ALL
+        self.masterKey = None
 
     def onChanged(self, fp, prop):
-        if prop == "beta":
-            self.betaChanged = True
-        else:
-            self.betaChanged = False
+        self.dirty = getattr(self, 'dirty', ALL) | slaveMasterStages.get(prop, 0)
 
-    def execute(self, fp):
-        if self.betaChanged is False:
-            inputData = inputDataClass(fp.m.Value, fp.phi_s.Value, fp.N_m, fp.N_s, fp.Bl.Value, fp.c, fp.deltaCs.Value, fp.deltatp.Value, fp.offset_m.Value, fp.offset_s.Value, fp.n, fp.iL,fp.addendum_master)
-            cD = commonData()
-            master = gearData()
-            slave = gearData()
-
-            mainCalculations(inputData, cD, master, slave)
-
-            getProfile(master, slave, cD)
-            getProfile(slave, master, cD)
+    def onDocumentRestored(self, fp):
+        restoreMasterProperties(fp)
 
+    def execute(self, fp):
+        dirty = getattr(self, 'dirty', ALL)
+        fp_master = fp.fp_master
+        masterKey = parametersKey(fp_master)
+        if masterKey != getattr(self, 'masterKey', None):
+            dirty = dirty | SOLID
+
+        if dirty & (MATH | PROFILE):
+            cD, master, slave = getGears(self.inputData(fp))
             loadProperties(fp, cD, master, slave)
 
-            W_m = getWire(master)           
-
-            fp_master = fp.fp_master
-            hseparator = fp.hseparator.Value
-            tita = fp.tita.Value
-
-            slave_thickness = fp_master.thickness.Value
-            if hseparator < 0.0:
-                z = - fp.thickness.Value
-            else:
-                z = slave_thickness
-
-            Solid_m = getMasterShape(fp, W_m, z + hseparator, tita)
-
-            Solid_s = getSlaveShape(fp_master)
-
-            W_s = fp_master.W_s.copy()
-
-            if hseparator < 0.0:
-                z = hseparator
-            else:
-                z = slave_thickness
-            thickness = abs(hseparator)
-
-            if fp_master.N_s >= fp.N_m:
-                if fp.gearType == "Helical" and hseparator < 0:
-                    angle2 = fp.helicalPortion * (360 / fp_master.N_m)
-                else:
-                    angle2 = 0
-                Solid_separator = commonextrusion(W_m, thickness, App.Vector(0, 0, z), tita + angle2)
-            else:
-                if fp_master.gearType == "Helical" and hseparator > 0:
-                    angle = - fp_master.helicalPortion * (360 / fp_master.N_s)
-                else:
-                    angle = 0
-                Solid_separator = commonextrusion(W_s, thickness, App.Vector(0, 0, z), angle)
-
-            if hseparator < 0.0:
-                z = 0
-            else:
-                z = slave_thickness
-            faces = Solid_s.Faces + Solid_separator.Faces + Solid_m.Faces
-            faces = [f for f in faces if not (abs(f.CenterOfMass.z - z) < 0.001 or abs(f.CenterOfMass.z - (z + hseparator)) < 0.001)]
-
-            if fp_master.N_s != fp.N_m:
-                if fp_master.gearType == "Helical" and hseparator > 0:
-                    angle = - fp_master.helicalPortion * (360 / fp_master.N_s)
-                else:
-                    angle = 0
-                if fp.gearType == "Helical" and hseparator < 0:
-                    angle2 = fp.helicalPortion * (360 / fp_master.N_m)
-                else:
-                    angle2 = 0
-                if fp_master.N_s > fp.N_m:
-                    W_m.Placement = App.Placement(App.Vector(0, 0, z), App.Rotation(App.Vector(0, 0, 1), tita + angle2))
-                    W_s.Placement = App.Placement(App.Vector(0, 0, z), App.Rotation(App.Vector(0, 0, 1), angle))
-                    W_s.reverse()
-                    middleFace = Face([W_s, W_m])
-                else:
-                    W_s.Placement = App.Placement(App.Vector(0, 0, z + hseparator), App.Rotation(App.Vector(0, 0, 1), angle))
-                    W_m.Placement = App.Placement(App.Vector(0, 0, z + hseparator), App.Rotation(App.Vector(0, 0, 1), tita + angle2))
-                    W_m.reverse()
-                    middleFace = Face([W_m, W_s])
-                faces.append(middleFace)
-
-            Solid_sm = makeSolid(makeShell(faces))
-
-            fp.Shape = Solid_sm
-
-            W_s = getWire(slave)
-            fp.W_s = W_s
+        if dirty & (WIRE | SOLID):
+            key = shapeKey(parametersKey(fp, inputProperties + ('hseparator', 'tita')), masterKey)
+            shapes = loadShapes(key)
+            if shapes is None:
+                cD, master, slave = getGears(self.inputData(fp))
+                shapes = self.buildShapes(fp, fp_master, master, slave)
+                saveShapes(key, shapes)
+            fp.Shape = shapes[0]
+            setWire(fp, shapes[1])
+            self.masterKey = masterKey
 
         updatePosition(fp)
-        self.betaChanged = False
+        self.dirty = 0
 
+    def inputData(self, fp):
+        return inputDataClass(fp.m.Value, fp.phi_s.Value, fp.N_m, fp.N_s, fp.Bl.Value, fp.c, fp.deltaCs.Value, fp.deltatp.Value, fp.offset_m.Value, fp.offset_s.Value, fp.n, fp.iL, fp.addendum_master, tol=fp.tolerance.Value)
+
+    def buildShapes(self, fp, fp_master, master, slave):
+        W_m = getWire(master)
+        Solid_sm = getStackedShape(fp, fp_master, W_m, fp_master.W_s)
+        W_s = getWire(slave)
+        return [Solid_sm, W_s]
 
 class ViewProviderInternalGear():
     def __init__(self, obj):
@@ -288,44 +246,42 @@ class InternalGear():
 
     def __init__(self, fp, form):
         self.Type = 'internalGear'
+        self.dirty = ALL
         fp.Proxy = self
 
-        addMasterProperties(fp, form[0], form[1])
+        addMasterProperties(fp, form[0], form[1], slaveOnly=True)
             
         fp.addProperty('App::PropertyLength', 'extThickness', '1 - Gears Parameters', 'External thickness').extThickness = form[0].doubleSpinBox_7.text()
 
-    def execute(self, fp):
-        inputData = inputDataClass(fp.m.Value, fp.phi_s.Value, fp.N_m, fp.N_s, fp.Bl.Value, fp.c, fp.deltaCs.Value, fp.deltatp.Value, fp.offset_m.Value, fp.offset_s.Value, fp.n, fp.iL,fp.addendum_master)
-        cD = commonData()
-        master = gearData()
-        slave = gearData()
-
-        mainCalculations(inputData, cD, master, slave, True)
-
-        getProfile(master, slave, cD, True)
-        inputData = inputDataClass(fp.m.Value, fp.phi_s.Value, fp.N_m, fp.N_s, fp.Bl.Value, fp.c_slave, fp.deltaCs.Value, fp.deltatp.Value, fp.offset_m.Value, fp.offset_s.Value, fp.n, fp.iL,fp.addendum_slave)
-        mainCalculations(inputData, cD, master, slave, True)
-
-        getProfile(slave, master, cD)
-
-        loadProperties(fp, cD, master, slave)
-      
-        fp.Cs.Value = abs(master.Rs - slave.Rs)
-        fp.Center_d.Value = abs(master.Rp - slave.Rp)
-        fp.angle_s.Value = slave.beta0 * 180 / pi - 180 + 180 / fp.N_s
-
-        W_m = getWire(master)
-
-        fp.thickness.Value = fp.thickness.Value + 0.005
-        Solid_m = getInternalShape(fp, W_m)
+    def onChanged(self, fp, prop):
+        self.dirty = getattr(self, 'dirty', ALL) | internalStages.get(prop, 0)
 
-        thickness = fp.thickness.Value - 0.005
-        cylinder = makeCylinder(master.RTc + fp.extThickness.Value, thickness)
-        Solid_m = cylinder.cut(Solid_m)
-        fp.Shape = Solid_m
+    def onDocumentRestored(self, fp):
+        restoreMasterProperties(fp)
 
-        W_s = getWire(slave)
-        fp.W_s = W_s
+    def execute(self, fp):
+        dirty = getattr(self, 'dirty', ALL)
+        if dirty & (MATH | PROFILE):
+            cD, master, slave = getGears(self.inputData(fp), True)
+            loadProperties(fp, cD, master, slave, internal=True)
+
+        if dirty & (WIRE | SOLID):
+            key = shapeKey(parametersKey(fp, inputProperties + ('extThickness',)))
+            shapes = loadShapes(key)
+            if shapes is None:
+                cD, master, slave = getGears(self.inputData(fp), True)
+                W_m = getWire(master)
+                Solid_m = getInternalShape(fp, W_m, master.RTc + fp.extThickness.Value)
+
+                W_s = getWire(slave)
+                shapes = [Solid_m, W_s]
+                saveShapes(key, shapes)
+            fp.Shape = shapes[0]
+            setWire(fp, shapes[1])
+        self.dirty = 0
+
+    def inputData(self, fp):
+        return inputDataClass(fp.m.Value, fp.phi_s.Value, fp.N_m, fp.N_s, fp.Bl.Value, fp.c, fp.deltaCs.Value, fp.deltatp.Value, fp.offset_m.Value, fp.offset_s.Value, fp.n, fp.iL, fp.addendum_master, fp.c_slave, fp.addendum_slave, fp.tolerance.Value)
 
 
 class ViewProviderMasterBevelGear():
@@ -349,33 +305,36 @@ class MasterBevelGear():
 
     def __init__(self, fp, form):
         self.Type = 'masterBevelGear'
+        self.dirty = ALL
         fp.Proxy = self
 
         addMasterProperties(fp, form[0], form[1], True)
 
-    def execute(self, fp):
-        inputData = inputDataClass_b(fp.m.Value, fp.rho.Value, fp.N_m, fp.N_s, fp.Bl.Value, fp.thickness.Value, fp.Sigma.Value, fp.c, fp.deltatp.Value, fp.n, fp.iL,fp.addendum_master)
-        cD = commonData_b()
-        master = gearData_b()
-        slave = gearData_b()
-
-        mainCalculations_b(inputData, cD, master, slave)
-
-        getProfile_b(master, slave, cD)
-
-        inputData = inputDataClass_b(fp.m.Value, fp.rho.Value, fp.N_m, fp.N_s, fp.Bl.Value, fp.thickness.Value, fp.Sigma.Value, fp.c_slave, fp.deltatp.Value, fp.n, fp.iL,fp.addendum_slave)
-        mainCalculations_b(inputData, cD, master, slave)
-        getProfile_b(slave, master, cD)
-
-        loadProperties(fp, cD, master, slave, True)
-
-        W_m = getBevelWire(master)
+    def onChanged(self, fp, prop):
+        self.dirty = getattr(self, 'dirty', ALL) | masterBevelStages.get(prop, 0)
 
-        Solid_m = getBevelShape(fp, W_m)
-        fp.Shape = Solid_m
+    def onDocumentRestored(self, fp):
+        restoreMasterProperties(fp)
 
-        W_s = getBevelWire(slave)
-        fp.W_s = W_s
+    def execute(self, fp):
+        dirty = getattr(self, 'dirty', ALL)
+        if dirty & (MATH | PROFILE):
+            cD, master, slave = getGears(getBevelInputData(fp), bevel=True)
+            loadProperties(fp, cD, master, slave, True)
+
+        if dirty & (WIRE | SOLID):
+            key = shapeKey(parametersKey(fp))
+            shapes = loadShapes(key)
+            if shapes is None:
+                cD, master, slave = getGears(getBevelInputData(fp), bevel=True)
+                W_m = getBevelWire(master)
+                Solid_m = getBevelShape(fp, W_m, gear=master)
+                W_s = getBevelWire(slave)
+                shapes = [Solid_m, W_s]
+                saveShapes(key, shapes)
+            fp.Shape = shapes[0]
+            setWire(fp, shapes[1])
+        self.dirty = 0
 
 
 class ViewProviderSlaveBevelGear():
@@ -407,22 +366,25 @@ class SlaveBevelGear():
         part_slave.addProperty('App::PropertyFloat', 'relation', 'Gear relation', 'Gear relation')
 
         addAdditionalProperties(fp)
-        slaveBevelPartExpressions(fp, fp_master)
+        addToController(fp, fp_master)
 
-        self.betaChanged = False
+        self.dirty = ALL
+        self.masterKey = None
 
     def onChanged(self, fp, prop):
-        if prop == "beta":
-            self.betaChanged = True
-        else:
-            self.betaChanged = False
+        self.dirty = getattr(self, 'dirty', ALL) | slaveStages.get(prop, 0)
 
     def execute(self, fp):
-        if self.betaChanged is False:
-            fp_master = fp.fp_master
+        dirty = getattr(self, 'dirty', ALL)
+        fp_master = fp.fp_master
+        masterKey = parametersKey(fp_master)
+        if masterKey != getattr(self, 'masterKey', None):
+            dirty = dirty | SOLID
 
+        if dirty & SOLID:
             Solid_s = getBevelShape(fp_master, None, True)
             fp.Shape = Solid_s
+            self.masterKey = masterKey
 
         updatePosition(fp)
-        self.betaChanged = False
+        self.dirty = 0
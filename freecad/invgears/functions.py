@@ -22,9 +22,58 @@
 # *                                                                         *
 # ***************************************************************************
 
+from collections import OrderedDict
+from hashlib import sha1
+
 import FreeCAD as App
-from Part import makeHelix, makeSolid, makeShell, Wire, Face, Arc, BSplineCurve, makeSphere, Point, makeLoft
-from numpy import pi, sin, cos, arctan, array, sqrt
+from Part import makeHelix, makeSolid, makeShell, Wire, Face, Arc, BSplineCurve, makeSphere, Point, makeLoft, makeCircle, Sphere, OCCError
+from Part import LineSegment, makeCompound
+from numpy import pi, sin, cos, arctan, arctan2, array, sqrt, vstack, zeros, linspace, ceil, copysign
+from freecad.invgears.bspline import polesMultsKnots
+from freecad.invgears.diskCache import shapeKey, storedShape
+from freecad.invgears.gears_bevel import inputDataClass_b
+from freecad.invgears.profileCache import getGears
+
+
+# properties that select how the curves and solids are built, with the same parameters they give
+# different shapes, so they must stay in every shape key
+algorithmProperties = ('helicalMode', 'buildMode', 'tolerance')
+
+# properties of a master feature that define its solids and its slave wire W_s
+inputProperties = ('m', 'phi_s', 'rho', 'N_m', 'N_s', 'Bl', 'gearType', 'helicalPortion', 'thickness', 'Sigma',
+                   'addendum_master', 'addendum_slave', 'c', 'c_slave', 'deltaCs', 'deltatp', 'offset_m', 'offset_s',
+                   'n', 'iL') + algorithmProperties
+
+
+def parametersKey(fp, names=inputProperties):
+    values = []
+    for name in names:
+        value = getattr(fp, name, None)
+        values.append(repr(getattr(value, 'Value', value)))
+    return sha1(repr((fp.Proxy.Type, values)).encode()).hexdigest()
+
+
+class shapesCache():
+    # LRU cache of solids by parameters key, the callers get copies
+    def __init__(self, maxEntries=32):
+        self.maxEntries = maxEntries
+        self.entries = OrderedDict()
+
+    def get(self, key, build):
+        Solid = self.entries.get(key)
+        if Solid is None:
+            Solid = build()
+            self.entries[key] = Solid
+            while len(self.entries) > self.maxEntries:
+                self.entries.popitem(last=False)
+        self.entries.move_to_end(key)
+        return Solid.copy()
+
+    def clear(self):
+        self.entries.clear()
+
+
+slaveShapes = shapesCache()
 
 
 def commonextrusion(wire, height, vPos=App.Vector(0, 0, 0), orientation=0):
@@ -34,71 +83,304 @@ def commonextrusion(wire, height, vPos=App.Vector(0, 0, 0), orientation=0):
     return solid
 
 
-def helicalextrusion(wire, height, angle, vPos=App.Vector(0, 0, 0), orientation=0):
+def ringextrusion(lateral, wire, R, height, twist, vPos=App.Vector(0, 0, 0), orientation=0):
+    # solid between the rim cylinder of radius R and the lateral faces swept by wire. The top face is
+    # the bottom face rotated twist radians
+    wire.Placement = App.Placement(vPos, App.Rotation(App.Vector(0, 0, 1), orientation))
+    bottom = Face([Wire(makeCircle(R, vPos)), wire])
+    top = bottom.copy()
+    top.rotate(App.Vector(0, 0, 0), App.Vector(0, 0, 1), twist * 180 / pi)
+    top.translate(App.Vector(0, 0, height))
+    rim = makeCircle(R, vPos).extrude(App.Vector(0, 0, height))
+    faces = lateral.Faces + rim.Faces + [bottom, top]
+    solid = makeSolid(makeShell(faces))
+    return solid
+
+
+def helicalextrusion(wire, height, angle, vPos=App.Vector(0, 0, 0), orientation=0, solid=True):
     direction = bool(angle < 0)
     first_spine = makeHelix(height * (2 * pi / abs(angle)), height, height, 0, direction)
     first_spine.Placement = App.Placement(vPos, App.Rotation(App.Vector(0, 0, 1), 0))
     wire.Placement = App.Placement(vPos, App.Rotation(App.Vector(0, 0, 1), orientation))
-    first_solid = first_spine.makePipeShell([wire], True, True)
+    first_solid = first_spine.makePipeShell([wire], solid, True)
     return first_solid
 
 
-def doublehelicalextrusion(wire, height, angle, vPos=App.Vector(0, 0, 0), orientation=0):
+def helicalloft(wire, height, angle, tol, vPos=App.Vector(0, 0, 0), orientation=0, double=False, solid=True):
+    # ruled loft through rotated copies of the wire instead of a sweep along a helix. The sections are
+    # close enough for the chords between them to deviate less than tol from the helix at the outer radius
+    R = wire.BoundBox.DiagonalLength / 2
+    K = max(1, int(ceil(abs(angle) / sqrt(8 * tol / R))))
+    if double:
+        z = linspace(0, height, 2 * K + 1)
+        twist = angle * (1 - abs(2 * z / height - 1))
+    else:
+        z = linspace(0, height, K + 1)
+        twist = angle * z / height
+    sections = []
+    for zk, twistk in zip(z, twist):
+        section = wire.copy()
+        section.Placement = App.Placement(vPos + App.Vector(0, 0, zk), App.Rotation(App.Vector(0, 0, 1), orientation + twistk * 180 / pi))
+        sections.append(section)
+    return makeLoft(sections, solid, True)
+
+
+def loftTolerance(fp):
+    # the curves tolerance when it is set, otherwise 0.01 mm
+    tol = fp.tolerance.Value
+    if tol > 0:
+        return tol
+    return 0.01
+
+
+def doublehelicalextrusion(wire, height, angle, vPos=App.Vector(0, 0, 0), orientation=0, solid=True):
     direction = bool(angle < 0)
     first_spine = makeHelix((height / 2) * (2 * pi / abs(angle)), height / 2, height, 0, direction)
     first_spine.Placement = App.Placement(vPos, App.Rotation(App.Vector(0, 0, 1), 0))
     wire.Placement = App.Placement(vPos, App.Rotation(App.Vector(0, 0, 1), orientation))
-    first_solid = first_spine.makePipeShell([wire], True, True)
-    second_solid = first_solid.mirror(App.Vector(0, 0, vPos.z + height / 2), App.Vector(0, 0, 1))
-    faces = first_solid.Faces + second_solid.Faces
-    faces = [f for f in faces if not (abs(f.CenterOfMass.z - (vPos.z + height / 2)) < 0.001)]
+    # lateral faces of the lower half without caps, the upper half and the top face are their mirror images,
+    # so the middle plane never gets faces
+    first_shell = first_spine.makePipeShell([wire], False, True)
+    second_shell = first_shell.mirror(App.Vector(0, 0, vPos.z + height / 2), App.Vector(0, 0, 1))
+    if not solid:
+        return makeShell(first_shell.Faces + second_shell.Faces)
+    bottom = Face(wire)
+    top = bottom.mirror(App.Vector(0, 0, vPos.z + height / 2), App.Vector(0, 0, 1))
+    faces = first_shell.Faces + second_shell.Faces + [bottom, top]
     solid = makeSolid(makeShell(faces))
     return solid
 
 
-def getMasterShape(fp, W, z=0.0, tita=0.0):
+def getSweptShape(fp, W, helicalAngle, vPos=App.Vector(0, 0, 0), orientation=0):
     thickness = fp.thickness.Value
     if fp.gearType == "Spur":
-        Solid = commonextrusion(W, thickness, App.Vector(0, 0, z), tita)
+        Solid = commonextrusion(W, thickness, vPos, orientation)
     if fp.gearType == "Helical":
-        helicalAngle = fp.helicalPortion * (2 * pi / fp.N_m)
-        Solid = helicalextrusion(W, thickness, helicalAngle, App.Vector(0, 0, z), tita)
+        if fp.helicalMode == "Loft":
+            Solid = helicalloft(W, thickness, helicalAngle, loftTolerance(fp), vPos, orientation)
+        else:
+            Solid = helicalextrusion(W, thickness, helicalAngle, vPos, orientation)
     if fp.gearType == "Double Helical":
-        helicalAngle = fp.helicalPortion * (2 * pi / fp.N_m)
-        Solid = doublehelicalextrusion(W, thickness, helicalAngle, App.Vector(0, 0, z), tita)
+        if fp.helicalMode == "Loft":
+            Solid = helicalloft(W, thickness, helicalAngle, loftTolerance(fp), vPos, orientation, True)
+        else:
+            Solid = doublehelicalextrusion(W, thickness, helicalAngle, vPos, orientation)
     return Solid
 
 
+def getToothedShape(fp, W, N, helicalAngle, vPos=App.Vector(0, 0, 0), orientation=0):
+    # the solid swept by the whole wire W, or by one tooth cell replicated N times around the z axis
+    if fp.buildMode == "Profile":
+        return getSweptShape(fp, W, helicalAngle, vPos, orientation)
+    cell = getSweptShape(fp, getCellWire(W, N), helicalAngle, vPos, orientation)
+    return polarCopies(cell, N, fp.buildMode == "Tooth cells fused")
+
+
+def getCellWire(W, N):
+    # one tooth of the closed wire W joined to the z axis with two radial lines
+    n = len(W.Edges) // N
+    edges = W.OrderedEdges[:n]
+    vertexes = W.OrderedVertexes
+    first = vertexes[0].Point
+    last = vertexes[n].Point
+    center = App.Vector(0, 0, first.z)
+    return Wire([LineSegment(center, first).toShape()] + edges + [LineSegment(last, center).toShape()])
+
+
+def polarCopies(cell, N, fuse=False):
+    # the cells only share their radial faces, the compound is the gear without any boolean
+    cells = rotatedCopies([cell], N)
+    if fuse:
+        return cells[0].multiFuse(cells[1:]).removeSplitter()
+    return makeCompound(cells)
+
+
+def getMasterShape(fp, W, z=0.0, tita=0.0):
+    helicalAngle = fp.helicalPortion * (2 * pi / fp.N_m) if fp.gearType != "Spur" else 0.0
+    return getToothedShape(fp, W, fp.N_m, helicalAngle, App.Vector(0, 0, z), tita)
+
+
 def getSlaveShape(fp_master):
-    thickness = fp_master.thickness.Value
+    # every slave of the same master has the same solid, it is built once per master parameters
+    key = parametersKey(fp_master)
+    return slaveShapes.get(key, lambda: storedShape(shapeKey('slave', key), lambda: buildSlaveShape(fp_master)))
+
+
+def buildSlaveShape(fp_master):
     W = fp_master.W_s.copy()
-    if fp_master.gearType == "Spur":
-        Solid = commonextrusion(W, thickness)
-    if fp_master.gearType == "Helical":
-        helicalAngle = -fp_master.helicalPortion * (2 * pi / fp_master.N_s)
-        Solid = helicalextrusion(W, thickness, helicalAngle)
-    if fp_master.gearType == "Double Helical":
-        helicalAngle = -fp_master.helicalPortion * (2 * pi / fp_master.N_s)
-        Solid = doublehelicalextrusion(W, thickness, helicalAngle)
+    helicalAngle = -fp_master.helicalPortion * (2 * pi / fp_master.N_s) if fp_master.gearType != "Spur" else 0.0
+    return getToothedShape(fp_master, W, fp_master.N_s, helicalAngle)
+
+
+def getLateralShape(fp, W, height, angle, vPos=App.Vector(0, 0, 0), orientation=0):
+    # faces swept by W for the gear type of fp without the bottom and top faces, and the rotation of the
+    # top section (rad)
+    if fp.gearType == "Spur":
+        W.Placement = App.Placement(vPos, App.Rotation(App.Vector(0, 0, 1), orientation))
+        return W.extrude(App.Vector(0, 0, height)), 0.0
+    double = fp.gearType == "Double Helical"
+    if fp.helicalMode == "Loft":
+        lateral = helicalloft(W, height, angle, loftTolerance(fp), vPos, orientation, double, False)
+    elif double:
+        lateral = doublehelicalextrusion(W, height, angle, vPos, orientation, False)
+    else:
+        lateral = helicalextrusion(W, height, angle, vPos, orientation, False)
+    if double:
+        return lateral, 0.0
+    return lateral, angle
+
+
+def placedWire(W, z, orientation):
+    wire = W.copy()
+    wire.Placement = App.Placement(App.Vector(0, 0, z), App.Rotation(App.Vector(0, 0, 1), orientation))
+    return wire
+
+
+def getStackedShape(fp, fp_master, W_m, W_s):
+    # slave gear of fp_master, separator and master gear of fp stacked along z. The solid is made of their
+    # lateral faces, the two end faces and the annulus where the separator meets the larger gear, so there
+    # are no faces on the inner planes to remove
+    hseparator = fp.hseparator.Value
+    tita = fp.tita.Value
+    slave_thickness = fp_master.thickness.Value
+    master_thickness = fp.thickness.Value
+    slaveAngle = -fp_master.helicalPortion * (2 * pi / fp_master.N_s)
+    masterAngle = fp.helicalPortion * (2 * pi / fp.N_m)
+
+    # z_sm plane between slave and separator, z_mm plane between separator and master
+    if hseparator < 0.0:
+        z_sm = 0.0
+        z_mm = hseparator
+        z_m = hseparator - master_thickness
+    else:
+        z_sm = slave_thickness
+        z_mm = slave_thickness + hseparator
+        z_m = z_mm
+
+    slaveLateral, slaveTwist = getLateralShape(fp_master, W_s.copy(), slave_thickness, slaveAngle)
+    masterLateral, masterTwist = getLateralShape(fp, W_m.copy(), master_thickness, masterAngle, App.Vector(0, 0, z_m), tita)
+    slaveTwist = slaveTwist * 180 / pi
+    masterTwist = masterTwist * 180 / pi
+
+    # orientation of the gear sections that touch the separator
+    if hseparator < 0.0:
+        slave_sm = 0.0
+        master_mm = tita + masterTwist
+        bottom = Face(placedWire(W_m, z_m, tita))
+        top = Face(placedWire(W_s, slave_thickness, slaveTwist))
+    else:
+        slave_sm = slaveTwist
+        master_mm = tita
+        bottom = Face(placedWire(W_s, 0.0, 0.0))
+        top = Face(placedWire(W_m, z_m + master_thickness, tita + masterTwist))
+
+    if fp_master.N_s >= fp.N_m:
+        separator = placedWire(W_m, min(z_sm, z_mm), master_mm)
+    else:
+        separator = placedWire(W_s, min(z_sm, z_mm), slave_sm)
+    separatorLateral = separator.extrude(App.Vector(0, 0, abs(hseparator)))
+
+    faces = slaveLateral.Faces + separatorLateral.Faces + masterLateral.Faces + [bottom, top]
+    if fp_master.N_s > fp.N_m:
+        faces.append(Face([placedWire(W_s, z_sm, slave_sm), placedWire(W_m, z_sm, master_mm)]))
+    elif fp_master.N_s < fp.N_m:
+        faces.append(Face([placedWire(W_m, z_mm, master_mm), placedWire(W_s, z_mm, slave_sm)]))
+
+    Solid = makeSolid(makeShell(faces))
     return Solid
 
 
-def getInternalShape(fp, W, z=0.0, tita=0.0):
+def getInternalShape(fp, W, R, z=0.0, tita=0.0):
+    # the ring between the rim circle of radius R and the tooth wire W, without booleans
     thickness = fp.thickness.Value
+    vPos = App.Vector(0, 0, z)
     if fp.gearType == "Spur":
-        Solid = commonextrusion(W, thickness, App.Vector(0, 0, z), tita)
-    if fp.gearType == "Helical":
+        W.Placement = App.Placement(vPos, App.Rotation(App.Vector(0, 0, 1), tita))
+        face = Face([Wire(makeCircle(R, vPos)), W])
+        Solid = face.extrude(App.Vector(0.0, 0.0, thickness))
+    else:
         helicalAngle = - fp.helicalPortion * (2 * pi / fp.N_m)
-        Solid = helicalextrusion(W, thickness, helicalAngle, App.Vector(0, 0, z), tita)
-    if fp.gearType == "Double Helical":
-        helicalAngle = - fp.helicalPortion * (2 * pi / fp.N_m)
-        Solid = doublehelicalextrusion(W, thickness, helicalAngle, App.Vector(0, 0, z), tita)
+        lateral, twist = getLateralShape(fp, W, thickness, helicalAngle, vPos, tita)
+        Solid = ringextrusion(lateral, W, R, thickness, twist, vPos, tita)
     return Solid
 
 
-def getBevelShape(fp, W, slave=False):
+def getBevelInputData(fp):
+    return inputDataClass_b(fp.m.Value, fp.rho.Value, fp.N_m, fp.N_s, fp.Bl.Value, fp.thickness.Value, fp.Sigma.Value, fp.c, fp.deltatp.Value, fp.n, fp.iL, fp.addendum_master, fp.c_slave, fp.addendum_slave, fp.tolerance.Value)
+
+
+def getBevelShape(fp, W, slave=False, gear=None):
     if slave is True:
-        W = fp.W_s.copy()
+        key = parametersKey(fp)
+        return slaveShapes.get(key, lambda: storedShape(shapeKey('slave', key), lambda: getBevelShape(fp, fp.W_s.copy(), False, getGears(getBevelInputData(fp), bevel=True)[2])))
+    if fp.buildMode != "Profile":
+        cell = buildBevelCell(gear, fp.lambda_.Value, fp.thickness.Value)
+        return polarCopies(cell, gear.N, fp.buildMode == "Tooth cells fused")
+    # solid made from the profiles on both spheres, the sphere booleans only when it is not valid
+    try:
+        Solid = buildBevelSolid(gear, fp.lambda_.Value, fp.thickness.Value)
+        if Solid.isValid():
+            return Solid
+    except OCCError:
+        pass
+    App.Console.PrintWarning("InvGears: bevel gear built with booleans\n")
+    return buildBevelShape(fp, W)
+
+
+def buildBevelSolid(gear, lambda_, thickness):
+    # the flanks are ruled surfaces between the same tooth on the inner (profile) and the outer (profile2)
+    # sphere, they are the cones from the origin. The spherical faces close the solid
+    n = len(gear.segments) - 1
+    W1 = Wire(rotatedCopies(getToothEdges(gear.profile[:n]), gear.N))
+    W2 = Wire(rotatedCopies(getToothEdges(gear.profile2[:n]), gear.N))
+    lateral = makeLoft([W1, W2], False, True)
+    faces = lateral.Faces + [Face(getToothSphere(lambda_), W1), Face(getToothSphere(lambda_ + thickness), W2)]
+    solid = makeSolid(makeShell(faces))
+    return solid
+
+
+def buildBevelCell(gear, lambda_, thickness):
+    # the first tooth between both spheres, closed with the planes through the z axis at its ends
+    n = len(gear.segments) - 1
+    W1, inner = getSphericalCell(gear.profile[:n])
+    W2, outer = getSphericalCell(gear.profile2[:n])
+    lateral = makeLoft([W1, W2], False, True)
+    faces = lateral.Faces + [Face(inner, W1), Face(outer, W2)]
+    solid = makeSolid(makeShell(faces))
+    return solid
+
+
+def getSphericalCell(tooth_profile):
+    # the tooth on its sphere joined to the pole with two meridian arcs. The poles and the seam of the
+    # sphere surface are placed away from the cell, whose pole is a regular point of the surface
+    first = App.Vector(*map(float, tooth_profile[0][:, 0]))
+    last = App.Vector(*map(float, tooth_profile[-1][:, -1]))
+    r = first.Length
+    pole = App.Vector(0, 0, copysign(r, first.z))
+    wire = Wire([meridianArc(pole, first)] + getToothEdges(tooth_profile) + [meridianArc(last, pole)])
+    phi = arctan2(first.y + last.y, first.x + last.x)
+    return wire, getToothSphere(r, phi)
+
+
+def getToothSphere(r, phi=0.0):
+    # sphere surface of radius r with its poles on the xy plane, perpendicular to the direction phi, and
+    # its seam through (0, 0, -r). The teeth are above the xy plane, so the faces bounded by them have
+    # neither a pole nor the seam inside
+    surface = Sphere()
+    surface.Radius = r
+    surface.transform(App.Matrix(0, -cos(phi), -sin(phi), 0,
+                                 0, -sin(phi), cos(phi), 0,
+                                 -1, 0, 0, 0,
+                                 0, 0, 0, 1))
+    return surface
+
+
+def meridianArc(a, b):
+    middle = (a + b).normalize() * a.Length
+    return Arc(a, middle, b).toShape()
+
+
+def buildBevelShape(fp, W):
     s1 = makeSphere(fp.lambda_.Value, App.Vector(0, 0, 0))
     s2 = makeSphere(fp.lambda_.Value + fp.thickness.Value, App.Vector(0, 0, 0))
     s3=s2.cut(s1)
@@ -111,35 +393,45 @@ def getBevelShape(fp, W, slave=False):
     return solid
 
 
-def getWire(gear):
+def getToothEdges(tooth_profile):
+    # edges of the first tooth, every third segment is an arc
     S = []
     index = 1
-    for profile in gear.profile:
+    for profile in tooth_profile:
+        if profile.shape[0] == 2:
+            profile = vstack([profile, zeros(profile.shape[1])])
         if index % 3 == 0:
-            arc = Arc(*list(map(lambda x, y: App.Vector(x, y, 0.0), profile[0, :], profile[1, :])))
+            arc = Arc(*list(map(lambda x, y, z: App.Vector(x, y, z), profile[0, :], profile[1, :], profile[2, :])))
             S.append(arc.toShape())
         else:
+            poles, mults, knots, degree = polesMultsKnots(profile)
             curve = BSplineCurve()
-            curve.interpolate(list(map(lambda x, y: App.Vector(x, y, 0.0), profile[0, :], profile[1, :])))
+            curve.buildFromPolesMultsKnots(poles, mults, knots, False, degree)
             S.append(curve.toShape())
         index = index + 1
-    W = Wire(S)
+    return S
+
+
+def rotatedCopies(edges, N):
+    # the other teeth are copies of the first tooth edges rotated around the z axis, no curve is interpolated again
+    S = list(edges)
+    for k in range(1, N):
+        for edge in edges:
+            copy = edge.copy()
+            copy.rotate(App.Vector(0, 0, 0), App.Vector(0, 0, 1), k * 360 / N)
+            S.append(copy)
+    return S
+
+
+def getWire(gear):
+    tooth = gear.profile[:len(gear.segments) - 1]
+    W = Wire(rotatedCopies(getToothEdges(tooth), gear.N))
     return W
 
 
 def getBevelWire(gear):
-    S = []
-    index = 1
-    for profile in gear.profile_onPlane:
-        if index % 3 == 0:
-            arc = Arc(*list(map(lambda x, y, z: App.Vector(x, y, z), profile[0, :], profile[1, :], profile[2, :])))
-            S.append(arc.toShape())
-        else:
-            curve = BSplineCurve()
-            curve.interpolate(list(map(lambda x, y, z: App.Vector(x, y, z), profile[0, :], profile[1, :], profile[2, :])))
-            S.append(curve.toShape())
-        index = index + 1
-    W = Wire(S)
+    tooth = gear.profile_onPlane[:len(gear.segments) - 1]
+    W = Wire(rotatedCopies(getToothEdges(tooth), gear.N))
     return W
 
 
@@ -172,6 +464,11 @@ def getPartFromFPSlave(fp):
         if part.Type == "Part_Slave" or part.Type == "Part_Slave_Master":
             return part
 
+def getPartFromFPBevelMaster(fp):
+    for part in fp._Body.InList:
+        if part.Type == "Part_Master_Bevel":
+            return part
+
 def getPartFromFPBevelSlave(fp):
     for part in fp._Body.InList:
         if part.Type == "Part_Slave_Bevel":
@@ -0,0 +1,101 @@
+# ***************************************************************************
+# *   Copyright (c) 2021 Sebastian Ernesto García <sebasg@outlook.com>      *
+# *                                                                         *
+# *   gearTrain.py                                                          *
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Lesser General Public License for more details.                   *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+
+from collections import deque
+
+gearTypes = ('masterGear', 'slaveGear', 'slaveMasterGear', 'internalGear', 'masterBevelGear', 'slaveBevelGear')
+
+
+def isGear(obj):
+    proxy = getattr(obj, 'Proxy', None)
+    return obj.TypeId == 'PartDesign::FeaturePython' and getattr(proxy, 'Type', None) in gearTypes
+
+
+class gearTrain():
+    # graph of the gear features of a document, every gear is a child of its fp_master
+    def __init__(self, doc):
+        self.features = {obj.Name: obj for obj in doc.Objects if isGear(obj)}
+        self.parents = {}
+        self.children = {name: [] for name in self.features}
+        for name, fp in self.features.items():
+            fp_master = getattr(fp, 'fp_master', None)
+            if fp_master is not None and fp_master.Name in self.features:
+                self.parents[name] = fp_master.Name
+                self.children[fp_master.Name].append(name)
+
+    def roots(self):
+        return [name for name in self.features if name not in self.parents]
+
+    def levels(self, names=None):
+        # the gears by depth from names (default the roots), each level only depends on the previous ones
+        level = list(self.roots() if names is None else names)
+        levels = []
+        seen = set()
+        while level:
+            level = [name for name in level if name not in seen]
+            seen.update(level)
+            if level:
+                levels.append(level)
+            level = [child for name in level for child in self.children[name]]
+        return levels
+
+    def order(self, names=None):
+        # topological order of names and their descendants, every gear after its master
+        return [name for level in self.levels(self.upmost(names)) for name in level]
+
+    def descendants(self, name):
+        found = []
+        queue = deque(self.children[name])
+        while queue:
+            child = queue.popleft()
+            found.append(child)
+            queue.extend(self.children[child])
+        return found
+
+    def upmost(self, names):
+        # names without the ones that are descendants of another one
+        if names is None:
+            return None
+        names = [name for name in names if name in self.features]
+        inside = set(child for name in names for child in self.descendants(name))
+        return [name for name in names if name not in inside]
+
+
+def recomputeTrain(doc, fps=None):
+    # a single ordered recompute of fps (default every gear), their descendants, their bodies and the parts
+    # that place them, instead of one document recompute per gear
+    train = gearTrain(doc)
+    names = None if fps is None else [fp.Name for fp in fps]
+    objects = []
+    for name in train.order(names):
+        fp = train.features[name]
+        objects.extend([fp, fp._Body])
+        parts = [fp._Body]
+        while parts:
+            parts = [obj for part in parts for obj in part.InList if obj.TypeId == 'App::Part' and obj not in objects]
+            objects.extend(parts)
+    # the controller places the parts after the gears
+    objects.extend(obj for obj in doc.Objects if getattr(getattr(obj, 'Proxy', None), 'Type', None) == 'gearTrainController')
+    if objects:
+        doc.recompute(objects, True)
@@ -22,65 +22,80 @@
 # ***************************************************************************
 
 from dataclasses import dataclass
-from numpy import nan, pi, sqrt, sin, cos, tan, arcsin, arccos, arctan, linspace, array, size, dot, copysign
+from numpy import nan, pi, sqrt, sin, cos, tan, arcsin, arccos, arctan, linspace, array, dot, arange, zeros, cumsum, matmul, argmax, unravel_index, take_along_axis, asarray, where, broadcast_arrays, errstate, full, ndim, argsort, insert, sort
 from numpy.core.shape_base import hstack, vstack
 from numpy.linalg import norm
-
-
-def brent(func, gear1, pinion, cD, a, b, xtol=1e-8, rtol=1.e-12, maxIter=100):
-    fa = func(gear1, pinion, cD, a)
-    fb = func(gear1, pinion, cD, b)
-    if (fa > 0 and fb > 0) or (fa < 0 and fb < 0):
-       return -1
-    c = b
-    fc = fb
-    for i in range(maxIter):
-        if ( fb > 0 and fc > 0) or (fb < 0 and fc < 0):
-            c = a
-            fc = fa
-            d = b - a
-            e = d
-        if abs(fc) < abs(fb):
-            a = b
-            b = c
-            c = a
-            fa = fb
-            fb = fc
-            fc = fa
-        tol1 = 2 * rtol * abs(b) + 0.5 * xtol
-        xm = 0.5 * (c-b)
-        if abs(xm) <= tol1 or fb == 0:
-            return b
-        if abs(e) >= tol1 and abs(fa) > abs(fb):
-            s = fb / fa
-            if a == c:
-                p = 2 * xm * s
-                q = 1 - s
-            else:
-                q = fa / fc
-                r = fb / fc
-                p = s * (2 * xm * q * (q - r) - (b - a) * (r - 1))
-                q = (q - 1) * (r - 1) * (s - 1)
-            if p > 0:
-                q = -q
-            p = abs(p)
-            if 2 * p < min(3 * xm * q - abs(tol1 * q), abs(e * q)):
-                e = d
-                d = p / q
-            else:
-                d = xm
-                e = d
-        else:
-            d = xm
-            e = d
-        a = b
-        fa = fb
-        if abs(d) > tol1:
-            b = b + d
-        else:
-            b = b + copysign(tol1, xm)
-        fb = func(gear1, pinion, cD, b)
-    return b
+from freecad.invgears.solvers import newton
+from freecad.invgears.bspline import deviation
+
+
+def replicateTooth(tooth_profile, N):
+    # rotates the tooth N times with one broadcasted product. The result is a (N, dim, points) array
+    # with the segments of each tooth side by side, segments has the column where each segment starts
+    tooth = hstack(tooth_profile)
+    dim = tooth.shape[0]
+    angle = 2 * pi * arange(N) / N
+    M = zeros((N, dim, dim))
+    M[:, 0, 0] = cos(angle)
+    M[:, 0, 1] = -sin(angle)
+    M[:, 1, 0] = sin(angle)
+    M[:, 1, 1] = cos(angle)
+    if dim == 3:
+        M[:, 2, 2] = 1
+    segments = cumsum([0] + [segment.shape[1] for segment in tooth_profile])
+    return matmul(M, tooth), segments
+
+
+def radialCrossing(points, R):
+    # points are polylines of shape (..., dim, n), a single segment or a whole profile_array. For each one
+    # it finds the first point inside the circle of radius R around the z axis and intersects the previous
+    # line with the circle (extended to the circle when the first point is already inside). It returns the
+    # intersection points (..., dim, 1) and the index of that first point. The polylines with no point inside
+    # are not clipped, they keep their first point (index 1)
+    R = asarray(R)[..., None]
+    r = norm(points[..., :2, :], axis=-2)
+    inside = r[..., 1:] < R
+    crosses = inside.any(axis=-1)
+    index = argmax(inside, axis=-1)
+    A = take_along_axis(points, index[..., None, None], axis=-1)
+    B = take_along_axis(points, index[..., None, None] + 1, axis=-1)
+    D = B - A
+    a = (D[..., :2, :]**2).sum(axis=-2)
+    b = (A[..., :2, :] * D[..., :2, :]).sum(axis=-2)
+    c = (A[..., :2, :]**2).sum(axis=-2) - R**2
+    with errstate(invalid='ignore', divide='ignore'):
+        t = (-b - sqrt(b**2 - a * c)) / a
+    inter_p = where(crosses[..., None, None], A + t[..., None, :] * D, points[..., :1])
+    return inter_p, where(crosses, index + 1, 1)
+
+
+def interpolationDeviation(curve, t):
+    # distance from the middle of every interval of t to the interpolated curve through curve(t),
+    # the same interpolation that draws the profiles
+    return deviation(curve(t), curve((t[:-1] + t[1:]) / 2))
+
+
+def adaptiveSampling(curve, t0, t1, tol, maxPoints):
+    # parameters from t0 to t1 where the interpolated curve through curve(t) deviates less than tol from the
+    # curve. Every pass splits the intervals that deviate more than tol, the worst ones first. maxPoints is
+    # the budget of this curve alone, a curve that still deviates more than tol with it is an error
+    t = linspace(t0, t1, min(5, maxPoints))
+    while True:
+        error = interpolationDeviation(curve, t)
+        split = (error > tol).nonzero()[0]
+        if split.size == 0:
+            return t
+        budget = maxPoints - t.size
+        if budget <= 0:
+            raise ValueError("InvGears: the curves need more than n = {} points for the tolerance, increase n or the tolerance".format(maxPoints))
+        if split.size > budget:
+            split = sort(split[argsort(error[split])[::-1][:budget]])
+        t = insert(t, split + 1, (t[split] + t[split + 1]) / 2)
+
+
+def segmentViews(profile_array, segments):
+    # list of views of profile_array, one per segment and tooth, in the order of the old profile list
+    return [profile_array[k, :, segments[i]:segments[i + 1]] for k in range(profile_array.shape[0]) for i in range(len(segments) - 1)]
 
 
 class getProfile():
@@ -113,7 +128,7 @@ class getProfile():
                 i_ps = hstack((i_ps[:, :i_index], inter_p))
                 f_ps = hstack((inter_p, f_ps[:, f_index:]))
             
-            inter_p, index = self.__tipIntersection(i_ps, RT1)
+            inter_p, index = radialCrossing(i_ps, RT1)
             i_ps = hstack((inter_p, i_ps[:, index:]))
 
         M = array([[1, 0], [0, -1]])
@@ -131,69 +146,44 @@ class getProfile():
         tooth_profile = [f_ps_rev, i_ps_rev, tip_ps, i_ps, f_ps, root_ps]
         gear1.tooth_profile = tooth_profile
 
-        angle = 2 * pi / gear1.N
-        M = array([[cos(angle), -sin(angle)], [sin(angle), cos(angle)]])
-        profile = tooth_profile
-        aux_profile = tooth_profile
-        for i in range(gear1.N - 1):
-            aux_profile = list(map(lambda x: dot(M, x), aux_profile))
-            profile.extend(aux_profile)
-
-        gear1.profile = profile
-
-    def __tipIntersection(self, i_ps, RT1):
-        for i in range(size(i_ps, 1)):
-            if norm(i_ps[:, i + 1]) < RT1:
-                index = i
-                break
-
-        xA, yA = i_ps[:, index]
-        xB, yB = i_ps[:, index + 1]
-        m = (yB - yA) / (xB - xA)
-        mxA = m * xA
-        a = (1 + m**2)
-        b = 2 * m * (yA - mxA)
-        c = yA**2 + mxA**2 - 2 * yA * mxA - RT1**2
-        x = (-b + sqrt(b**2 - 4 * a * c)) / (2 * a)
-        y = yA + m * (x - xA)
-        inter_p = vstack([x, y])
-        index = index + 1
-        return inter_p, index
+        gear1.profile_array, gear1.segments = replicateTooth(tooth_profile, gear1.N)
+        gear1.profile = segmentViews(gear1.profile_array, gear1.segments)
 
     def __intersection(self, i_ps, f_ps):
-        for i in range(size(i_ps, 1) - 1):
-            for j in range(size(f_ps, 1) - 1):
-                i_pA = i_ps[:, i]
-                i_pB = i_ps[:, i + 1]
-                f_pA = f_ps[:, j]
-                f_pB = f_ps[:, j + 1]
-
-                Di = i_pB - i_pA
-                Df = f_pB - f_pA
-                DA = i_pA - f_pA
-
-                M = array([DA[0], -DA[1]]) / (Df[0] * Di[1] - Di[0] * Df[1])
-
-                ki = dot(M, vstack([Df[1], Df[0]]))
-                kf = dot(M, vstack([Di[1], Di[0]]))
-
-                if 0 < ki < 1 and 0 < kf < 1:
-                    inter_p = i_ps[:, [i]] + ki * (i_ps[:, [i + 1]] - i_ps[:, [i]])
-                    i_index = i
-                    f_index = j + 1
-                    return inter_p, i_index, f_index
-
-        return -1, -1, -1
+        # every involute segment i against every fillet segment j at once, the first crossing
+        # in (i, j) order is returned
+        Di = (i_ps[:, 1:] - i_ps[:, :-1])[:, :, None]
+        Df = (f_ps[:, 1:] - f_ps[:, :-1])[:, None, :]
+        DA = i_ps[:, :-1, None] - f_ps[:, None, :-1]
+
+        with errstate(invalid='ignore', divide='ignore'):
+            den = Df[0] * Di[1] - Di[0] * Df[1]
+            ki = (DA[0] * Df[1] - DA[1] * Df[0]) / den
+            kf = (DA[0] * Di[1] - DA[1] * Di[0]) / den
+
+        crossing = (0 < ki) & (ki < 1) & (0 < kf) & (kf < 1)
+        if not crossing.any():
+            return -1, -1, -1
+
+        i, j = unravel_index(argmax(crossing), crossing.shape)
+        inter_p = i_ps[:, [i]] + ki[i, j] * (i_ps[:, [i + 1]] - i_ps[:, [i]])
+        i_index = i
+        f_index = j + 1
+        return inter_p, i_index, f_index
 
     def __involute(self, gear1, cD, internal):
         if internal:
             RT1 = gear1.RTc
         else:
             RT1 = gear1.RT
-        R = linspace(RT1, gear1.Rc, cD.n)
-        phi_R = arccos(gear1.Rb / R)
-        psi_R = sqrt(R**2 - gear1.Rb**2) / gear1.Rb - phi_R
-        tita_R = gear1.tb / (2 * gear1.Rb) - psi_R
+        curve = lambda R: self.__polarPoints(R, self.__involuteTita(gear1, R))
+        if cD.tol > 0:
+            R = adaptiveSampling(curve, RT1, gear1.Rc, cD.tol, cD.n)
+        else:
+            R = linspace(RT1, gear1.Rc, cD.n)
+        gear1.n_involute = R.size
+        gear1.deviation = interpolationDeviation(curve, R).max()
+        tita_R = self.__involuteTita(gear1, R)
 
         diff_tita_R = -sqrt(R**2 - gear1.Rb**2) / (R * gear1.Rb)
 
@@ -214,20 +204,22 @@ class getProfile():
 
     def __fillet(self, gear1, gear2, cD):
         if not gear1.FirstCond:
-            alpha0 = brent(self.__RComparation, gear1, gear2, None, 0, pi / 2)
+            alpha0 = newton(self.__RComparation, self.__diffRComparation, gear1, gear2, None, 0, pi / 2)
         else:
             alpha0 = arccos(gear2.Rb / gear2.RTc) - cD.phi_p
 
         alphaf = 0.0
-        alpha = linspace(alpha0, alphaf, cD.n)
+        curve = lambda alpha: self.__polarPoints(*self.__filletPolar(gear1, gear2, cD, alpha))
+        if cD.tol > 0:
+            alpha = adaptiveSampling(curve, alpha0, alphaf, cD.tol, cD.n)
+        else:
+            alpha = linspace(alpha0, alphaf, cD.n)
+        gear1.n_fillet = alpha.size
+        gear1.deviation = max(gear1.deviation, interpolationDeviation(curve, alpha).max())
         xi = gear2.Rp - gear2.RTc * cos(alpha)
         eta = -gear2.RTc * sin(alpha)
 
-        betac = alpha - gear2.tita_Tc
-        betag = - (gear2.Rs * betac + (cD.ps / 2)) / gear1.Rs
-
-        R = sqrt((gear1.Rp + xi)**2 + eta**2)
-        tita_R = arctan(eta / (gear1.Rp + xi)) - betag
+        R, tita_R = self.__filletPolar(gear1, gear2, cD, alpha)
 
         diff_xi = gear2.RTc * sin(alpha)
         diff_eta = -gear2.RTc * cos(alpha)
@@ -277,12 +269,38 @@ class getProfile():
 
         return points, normal
 
+    def __involuteTita(self, gear1, R):
+        phi_R = arccos(gear1.Rb / R)
+        psi_R = sqrt(R**2 - gear1.Rb**2) / gear1.Rb - phi_R
+        return gear1.tb / (2 * gear1.Rb) - psi_R
+
+    def __filletPolar(self, gear1, gear2, cD, alpha):
+        xi = gear2.Rp - gear2.RTc * cos(alpha)
+        eta = -gear2.RTc * sin(alpha)
+
+        betac = alpha - gear2.tita_Tc
+        betag = - (gear2.Rs * betac + (cD.ps / 2)) / gear1.Rs
+
+        R = sqrt((gear1.Rp + xi)**2 + eta**2)
+        tita_R = arctan(eta / (gear1.Rp + xi)) - betag
+        return R, tita_R
+
+    def __polarPoints(self, R, tita):
+        return vstack([R * cos(tita), R * sin(tita)])
+
     def __RComparation(self, gear1, gear2, cD, alpha):
         xi = gear2.Rp - gear2.RTc * cos(alpha)
         eta = -gear2.RTc * sin(alpha)
         R = sqrt((gear1.Rp + xi)**2 + eta**2)
         return R - gear1.Rc
 
+    def __diffRComparation(self, gear1, gear2, cD, alpha):
+        xi = gear2.Rp - gear2.RTc * cos(alpha)
+        eta = -gear2.RTc * sin(alpha)
+        diff_xi = gear2.RTc * sin(alpha)
+        diff_eta = -gear2.RTc * cos(alpha)
+        return ((gear1.Rp + xi) * diff_xi + eta * diff_eta) / sqrt((gear1.Rp + xi)**2 + eta**2)
+
     def __fusionpoint(self, i_ps, f_ps):
         fusion_p = (i_ps[:, -1] + f_ps[:, 0]) / 2
         i_ps[:, -1] = fusion_p
@@ -291,38 +309,48 @@ class getProfile():
 
 
 class mainCalculations():
+    # every field of inputData can be a numpy array, so a whole grid of gear pairs is solved at once
+    # and cD, gear1 and gear2 get array values. Scalar inputs give back plain python scalars
     def __init__(self, inputData, cD, gear1, gear2, internal=False):
 
-        self.__get_load_commonData1(cD, inputData)
+        with errstate(invalid='ignore', divide='ignore'):
+            self.__get_load_commonData1(cD, inputData)
 
-        if internal:
-            self.__get_load_gearData1(gear1, cD, inputData.N_m, -inputData.offset_m, -inputData.deltatp)
-        else:
-            self.__get_load_gearData1(gear1, cD, inputData.N_m, inputData.offset_m, inputData.deltatp)
+            c_s = inputData.c if inputData.c_slave is None else inputData.c_slave
+            addendum_s = inputData.addendum if inputData.addendum_slave is None else inputData.addendum_slave
+            N_m, N_s, offset_m, offset_s, deltatp, c_m, c_s, addendum_m, addendum_s = broadcast_arrays(inputData.N_m, inputData.N_s, inputData.offset_m, inputData.offset_s, inputData.deltatp, inputData.c, c_s, inputData.addendum, addendum_s)
+            if internal:
+                self.__get_load_gearData1(gear1, cD, N_m, -offset_m, -deltatp, c_m, addendum_m)
+            else:
+                self.__get_load_gearData1(gear1, cD, N_m, offset_m, deltatp, c_m, addendum_m)
 
-        self.__get_load_gearData1(gear2, cD, inputData.N_s, inputData.offset_s, -inputData.deltatp)
+            self.__get_load_gearData1(gear2, cD, N_s, offset_s, -deltatp, c_s, addendum_s)
 
-        self.__get_load_commonData2(cD, gear1, gear2)
+            self.__get_load_commonData2(cD, gear1, gear2)
 
-        self.__get_load_gearData2(gear1, gear2, cD, internal)
-        self.__get_load_gearData2(gear2, gear1, cD)
+            self.__get_load_gearData2(gear1, gear2, cD, internal)
+            self.__get_load_gearData2(gear2, gear1, cD)
 
-        gear1.beta0 = 0.0
-        gear2.beta0 = pi - ((gear1.tp + gear2.tp) / 2 + gear1.Rp * gear1.beta0) / gear2.Rp
+            gear1.beta0 = full(gear1.Rp.shape, 0.0)
+            gear2.beta0 = pi - ((gear1.tp + gear2.tp) / 2 + gear1.Rp * gear1.beta0) / gear2.Rp
 
-        self.__get_load_gearData3(gear1, gear2, cD)
-        self.__get_load_gearData3(gear2, gear1, cD)
+            self.__get_load_gearData3(gear1, gear2, cD)
+            self.__get_load_gearData3(gear2, gear1, cD)
 
-        self.__get_load_gearData4(gear1, gear2, cD)
-        self.__get_load_gearData4(gear2, gear1, cD, internal)
+            self.__get_load_gearData4(gear1, gear2, cD)
+            self.__get_load_gearData4(gear2, gear1, cD, internal)
 
-        self.__get_load_gearData5(gear1, gear2, cD)
-        self.__get_load_gearData5(gear2, gear1, cD)
+            self.__get_load_gearData5(gear1, gear2, cD)
+            self.__get_load_gearData5(gear2, gear1, cD)
 
-        self.__get_load_gearData6(gear1, gear2, cD)
-        self.__get_load_gearData6(gear2, gear1, cD)
+            self.__get_load_gearData6(gear1, gear2, cD)
+            self.__get_load_gearData6(gear2, gear1, cD)
 
-        self.__get_load_commonData3(cD, gear1, gear2)
+            self.__get_load_commonData3(cD, gear1, gear2)
+
+        if all(ndim(value) == 0 for value in vars(inputData).values() if value is not None):
+            for data in (cD, gear1, gear2):
+                self.__scalars(data)
 
     def __get_load_commonData1(self, cD, inputData):
         cD.m = inputData.m
@@ -331,16 +359,19 @@ class mainCalculations():
         cD.c = inputData.c
         cD.deltaCs = inputData.deltaCs
         cD.n = inputData.n
+        cD.tol = inputData.tol
         cD.iL = inputData.iL
         cD.addendum = inputData.addendum
         cD.ps = pi * cD.m
         cD.pb = cD.ps * cos(cD.phi_s)
         cD.pd = 1 / cD.m
 
-    def __get_load_gearData1(self, gear1, cD, N, offset, deltatp):
+    def __get_load_gearData1(self, gear1, cD, N, offset, deltatp, c, addendum):
         gear1.N = N
         gear1.offset = offset
         gear1.deltatp = deltatp
+        gear1.c = c
+        gear1.addendum = addendum
         gear1.Rs = gear1.N * cD.m / 2
         gear1.Rb = gear1.Rs * cos(cD.phi_s)
 
@@ -365,8 +396,7 @@ class mainCalculations():
         gear1.e = (gear1.ts - cD.ps / 2) / (2 * tan(cD.phi_s))
 
     def __get_load_gearData3(self, gear1, gear2, cD):
-        gear1.ap = (cD.m - (gear1.Rp - gear2.Rp - gear1.Rs + gear2.Rs - gear1.e + gear2.e) / 2) * cD.addendum
-        #gear1.ap = cD.m * cD.addendum
+        gear1.ap = (cD.m - (gear1.Rp - gear2.Rp - gear1.Rs + gear2.Rs - gear1.e + gear2.e) / 2) * gear1.addendum
         gear1.RT = gear1.Rp + gear1.ap
 
     def __get_load_gearData4(self, gear1, gear2, cD, internal=False):
@@ -376,9 +406,8 @@ class mainCalculations():
 
         if internal:
             gear1.RTc = gear1.RT
-
         else:
-            gear1.RTc = gear1.Rp + (1+cD.c) * cD.m
+            gear1.RTc = gear1.Rp + (1 + gear2.c) * cD.m
 
         gear1.apc = gear1.RTc - gear1.Rp
 
@@ -389,50 +418,50 @@ class mainCalculations():
 
         gear1.tita_Tc = gear1.tsc / (2 * gear1.Rs) + cD.psi_s - gear1.psi_Tc
 
-        if gear1.tita_Tc > 0:
-            gear1.ThirdCond = True
-        else:
-            gear1.ThirdCond = False
+        gear1.ThirdCond = gear1.tita_Tc > 0
 
     def __get_load_gearData5(self, gear1, gear2, cD):
-        if (cD.Center_d**2 - gear1.Rb**2 - 2 * gear1.Rb * gear2.Rb - gear2.RT**2) > 0:
-            gear1.FirstCond = True
-        else:
-            gear1.FirstCond = False
+        gear1.FirstCond = (cD.Center_d**2 - gear1.Rb**2 - 2 * gear1.Rb * gear2.Rb - gear2.RT**2) > 0
         RbplusRb = gear1.Rb + gear2.Rb
         gear1.RL = sqrt(gear1.Rb**2 + (sqrt(cD.Center_d**2 - (RbplusRb)**2) - sqrt(gear2.RT**2 - gear2.Rb**2))**2)
         gear1.Rf = sqrt(gear1.Rb**2 + (sqrt(cD.Center_d**2 - (RbplusRb)**2) - sqrt(gear2.RTc**2 - gear2.Rb**2))**2)
-        if gear1.Rf < gear1.RL - cD.iL * cD.m:
-            gear1.SecondCond = True
-        else:
-            gear1.SecondCond = False
+        gear1.SecondCond = gear1.Rf < gear1.RL - cD.iL * cD.m
 
     def __get_load_gearData6(self, gear1, gear2, cD):
-        if not gear1.FirstCond:
-            gear1.Ru = brent(self.__titaComparation, gear1, gear2, cD, gear1.Rb, gear1.Rp)
-            gear1.Rc = gear1.Ru
-        else:
-            gear1.Ru = nan
-            gear1.Rc = gear1.Rf
+        Ru = full(gear1.Rb.shape, nan)
+        undercut = ~gear1.FirstCond
+        if undercut.any():
+            sub1 = self.__take(gear1, undercut)
+            sub2 = self.__take(gear2, undercut)
+            subcD = self.__take(cD, undercut)
+            Ru[undercut] = newton(self.__titaComparation, self.__diffTitaComparation, sub1, sub2, subcD, sub1.Rb, sub1.Rp)
+        gear1.Ru = Ru
+        gear1.Rc = where(undercut, Ru, gear1.Rf)
 
     def __get_load_commonData3(self, cD, gear1, gear2):
-        if not gear1.FirstCond:
-            cD.mc = (sqrt(gear1.RT**2 - gear1.Rb**2) - sqrt(gear1.Ru**2 - gear1.Rb**2)) / cD.pb
-        if not gear2.FirstCond:
-            mc2 = (sqrt(gear2.RT**2 - gear2.Rb**2) - sqrt(gear2.Ru**2 - gear2.Rb**2)) / cD.pb
-            if not gear1.FirstCond:
-                if mc2 < cD.mc:
-                    cD.mc = mc2
-            else:
-                cD.mc = mc2
-        if gear1.FirstCond and gear2.FirstCond:
-            RbplusRb = gear1.Rb + gear2.Rb
-            cD.mc = (sqrt(gear1.RT**2 - gear1.Rb**2) + sqrt(gear2.RT**2 - gear2.Rb**2) - sqrt(cD.Center_d**2 - (RbplusRb)**2)) / cD.pb
-
-        if cD.mc > 1.4:
-            cD.fourthCond = True
-        else:
-            cD.fourthCond = False
+        mc1 = (sqrt(gear1.RT**2 - gear1.Rb**2) - sqrt(gear1.Ru**2 - gear1.Rb**2)) / cD.pb
+        mc2 = (sqrt(gear2.RT**2 - gear2.Rb**2) - sqrt(gear2.Ru**2 - gear2.Rb**2)) / cD.pb
+        RbplusRb = gear1.Rb + gear2.Rb
+        mc = (sqrt(gear1.RT**2 - gear1.Rb**2) + sqrt(gear2.RT**2 - gear2.Rb**2) - sqrt(cD.Center_d**2 - (RbplusRb)**2)) / cD.pb
+        mc = where(gear1.FirstCond, where(gear2.FirstCond, mc, mc2), where(gear2.FirstCond, mc1, where(mc2 < mc1, mc2, mc1)))
+
+        cD.mc = mc
+        cD.fourthCond = mc > 1.4
+
+    def __scalars(self, data):
+        # 0-d arrays and numpy scalars back to python floats, ints and bools
+        for key, value in vars(data).items():
+            if hasattr(value, 'item'):
+                setattr(data, key, value.item())
+
+    def __take(self, data, index):
+        # copy of data with only the gear pairs selected by index
+        sub = type(data)()
+        for key, value in vars(data).items():
+            if ndim(value) > 0:
+                value = value[index]
+            setattr(sub, key, value)
+        return sub
 
     def __titaComparation(self, gear1, gear2, cD, R):
         phi_R = arccos(gear1.Rb / R)
@@ -445,6 +474,18 @@ class mainCalculations():
 
         return tita_R_a - tita_R
 
+    def __diffTitaComparation(self, gear1, gear2, cD, R):
+        diff_tita_R = -sqrt(R**2 - gear1.Rb**2) / (R * gear1.Rb)
+
+        u = (cD.Center_d**2 + gear2.RTc**2 - R**2) / (2 * cD.Center_d * gear2.RTc)
+        diff_betac = R / (cD.Center_d * gear2.RTc * sqrt(1 - u**2))
+        diff_betag = - gear2.Rs * diff_betac / gear1.Rs
+        v = (gear2.RTc / R) * sqrt(1 - u**2)
+        diff_v = - v / R + u / (cD.Center_d * sqrt(1 - u**2))
+        diff_tita_R_a = - diff_v / sqrt(1 - v**2) - diff_betag
+
+        return diff_tita_R_a - diff_tita_R
+
 
 @dataclass
 class inputDataClass:
@@ -461,6 +502,9 @@ class inputDataClass:
     n: int
     iL: float
     addendum : float = 1
+    c_slave: float = None
+    addendum_slave: float = None
+    tol: float = 0.0
 
 @dataclass
 class commonData:
@@ -500,6 +544,8 @@ class commonData:
     mc: float = 0.0
     # Number of Point on curves
     n: int = 0
+    # Tolerance of the interpolated curves, with 0 they take n points (mm)
+    tol: float = 0.0
     FourthCond: bool = False
 
 
@@ -509,6 +555,10 @@ class gearData:
     N: int = 0
     # 3D printer offset (mm)
     offset: float = 0
+    # Clearance coefficient
+    c: float = 0.0
+    # Addendum coefficient
+    addendum: float = 1.0
     # Pitch Circle Radius (mm)
     Rp: float = 0.0
     # Standard Pitch Circle Radius (mm)
@@ -575,6 +625,11 @@ class gearData:
     tita_RT: float = 0.0
     # Angle where root curve start
     tita_Rroot: float = 0.0
+    # Number of points on the involute and fillet curves
+    n_involute: int = 0
+    n_fillet: int = 0
+    # Maximum deviation of the interpolated involute and fillet curves (mm)
+    deviation: float = 0.0
 
     FirstCond: bool = False
     SecondCond: bool = False
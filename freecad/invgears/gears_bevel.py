@@ -22,65 +22,11 @@
 # ***************************************************************************
 
 from dataclasses import dataclass
-from numpy import nan, pi, sqrt, sin, cos, tan, arcsin, arccos, arctan, linspace, array, size, dot, ones, copysign
+from numpy import nan, pi, sqrt, sin, cos, tan, arcsin, arccos, arctan, linspace, array, size, ones, stack, full
 from numpy.core.shape_base import hstack, vstack
 from numpy.linalg import norm
-
-
-def brent(func, gear1, gear2, cD, a, b, xtol=1e-8, rtol=1.e-12, maxIter=100):
-    fa = func(gear1, gear2, cD, a)
-    fb = func(gear1, gear2, cD, b)
-    if (fa > 0 and fb > 0) or (fa < 0 and fb < 0):
-       return -1
-    c = b
-    fc = fb
-    for i in range(maxIter):
-        if ( fb > 0 and fc > 0) or (fb < 0 and fc < 0):
-            c = a
-            fc = fa
-            d = b - a
-            e = d
-        if abs(fc) < abs(fb):
-            a = b
-            b = c
-            c = a
-            fa = fb
-            fb = fc
-            fc = fa
-        tol1 = 2 * rtol * abs(b) + 0.5 * xtol
-        xm = 0.5 * (c-b)
-        if abs(xm) <= tol1 or fb == 0:
-            return b
-        if abs(e) >= tol1 and abs(fa) > abs(fb):
-            s = fb / fa
-            if a == c:
-                p = 2 * xm * s
-                q = 1 - s
-            else:
-                q = fa / fc
-                r = fb / fc
-                p = s * (2 * xm * q * (q - r) - (b - a) * (r - 1))
-                q = (q - 1) * (r - 1) * (s - 1)
-            if p > 0:
-                q = -q
-            p = abs(p)
-            if 2 * p < min(3 * xm * q - abs(tol1 * q), abs(e * q)):
-                e = d
-                d = p / q
-            else:
-                d = xm
-                e = d
-        else:
-            d = xm
-            e = d
-        a = b
-        fa = fb
-        if abs(d) > tol1:
-            b = b + d
-        else:
-            b = b + copysign(tol1, xm)
-        fb = func(gear1, gear2, cD, b)
-    return b
+from freecad.invgears.solvers import brent, newton
+from freecad.invgears.gears import replicateTooth, segmentViews, adaptiveSampling, interpolationDeviation
 
 
 class getProfile_b():
@@ -100,28 +46,27 @@ class getProfile_b():
         tooth_profile = [f_m_ps, i_m_ps, tip_ps, i_ps, f_ps, base_ps]
         gear1.tooth_profile = tooth_profile
 
-        angle = 2 * pi / gear1.N
-        M = array([[cos(angle), -sin(angle), 0], [sin(angle), cos(angle), 0], [0, 0, 1]])
-        profile = tooth_profile
-        aux_profile = tooth_profile
-        for i in range(gear1.N - 1):
-            aux_profile = list(map(lambda x: dot(M, x), aux_profile))
-            profile.extend(aux_profile)
+        gear1.profile_array, gear1.segments = replicateTooth(tooth_profile, gear1.N)
+        gear1.profile = segmentViews(gear1.profile_array, gear1.segments)
 
         zp = cD.lambda_ + cD.thickness
-        gear1.profile = profile
-        gear1.profile_onPlane = list(map(lambda x: vstack([(zp / x[2, :]) * x[0, :], (zp / x[2, :]) * x[1, :], zp * ones((1 , x.shape[1]))]), gear1.profile))
+        P = gear1.profile_array
+        gear1.profile_onPlane_array = stack([(zp / P[:, 2, :]) * P[:, 0, :], (zp / P[:, 2, :]) * P[:, 1, :], full(P[:, 2, :].shape, zp)], axis=1)
+        gear1.profile_onPlane = segmentViews(gear1.profile_onPlane_array, gear1.segments)
 
-        M = (cD.lambda_ + cD.thickness) / cD.lambda_ * array([[1, 0, 0], [0, 1, 0], [0, 0, 1]])
-        gear1.profile2 = list(map(lambda x: dot(M, x), gear1.profile))
+        gear1.profile2_array = (cD.lambda_ + cD.thickness) / cD.lambda_ * P
+        gear1.profile2 = segmentViews(gear1.profile2_array, gear1.segments)
 
     def __involute_bevel(self, gear1, cD):
-        gamma = linspace(gear1.gamma_T, gear1.gamma_c, cD.n)
-
-        phi = arccos(cos(gear1.phi_p) * tan(gear1.gamma_p) / tan(gamma))
-        psi = (arctan(tan(phi) * sin(gear1.gamma_b)) / sin(gear1.gamma_b)) - phi
+        curve = lambda gamma: self.__sphericalPoints(cD, gamma, self.__involuteTita(gear1, gamma))
+        if cD.tol > 0:
+            gamma = adaptiveSampling(curve, gear1.gamma_T, gear1.gamma_c, cD.tol, cD.n)
+        else:
+            gamma = linspace(gear1.gamma_T, gear1.gamma_c, cD.n)
+        gear1.n_involute = gamma.size
+        gear1.deviation = interpolationDeviation(curve, gamma).max()
 
-        tita = gear1.tp / (2 * gear1.Rp) + gear1.psi_p - psi
+        tita = self.__involuteTita(gear1, gamma)
 
         x = array(cD.lambda_ * sin(gamma) * cos(tita))
         y = array(cD.lambda_ * sin(gamma) * sin(tita))
@@ -138,17 +83,20 @@ class getProfile_b():
 
     def __fillet(self, gear1, gear2, cD):
         if not gear1.FirstCond:
-            alpha0 = brent(self.__gammaComparation, gear1, gear2, cD, 0, pi / 2)
+            alpha0 = newton(self.__gammaComparation, self.__diffGammaComparation, gear1, gear2, cD, 0, pi / 2)
         else:
             alpha0 = gear2.phi_Tc - gear2.phi_p
 
         alphaf = 0.0
-        alpha = linspace(alpha0, alphaf, cD.n)
-       
-        betac = alpha - gear2.tita_Tc
-        betag = - (gear2.Rp * betac + (cD.pp / 2)) / gear1.Rp
-        gamma = arccos(cos(gear2.gamma_Tc) * cos(cD.Sigma) + sin(gear2.gamma_Tc) * sin(cD.Sigma) * cos(alpha))
-        tita  = -arctan((sin(gear2.gamma_Tc) * sin(cD.Sigma) * sin(alpha)) / (cos(gear2.gamma_Tc) - cos(cD.Sigma) * cos(gamma))) - betag
+        curve = lambda alpha: self.__sphericalPoints(cD, *self.__filletSpherical(gear1, gear2, cD, alpha))
+        if cD.tol > 0:
+            alpha = adaptiveSampling(curve, alpha0, alphaf, cD.tol, cD.n)
+        else:
+            alpha = linspace(alpha0, alphaf, cD.n)
+        gear1.n_fillet = alpha.size
+        gear1.deviation = max(gear1.deviation, interpolationDeviation(curve, alpha).max())
+
+        gamma, tita = self.__filletSpherical(gear1, gear2, cD, alpha)
 
         x = array(cD.lambda_ * sin(gamma) * cos(tita))
         y = array(cD.lambda_ * sin(gamma) * sin(tita))
@@ -163,6 +111,21 @@ class getProfile_b():
 
         return points, mirror_points
 
+    def __involuteTita(self, gear1, gamma):
+        phi = arccos(cos(gear1.phi_p) * tan(gear1.gamma_p) / tan(gamma))
+        psi = (arctan(tan(phi) * sin(gear1.gamma_b)) / sin(gear1.gamma_b)) - phi
+        return gear1.tp / (2 * gear1.Rp) + gear1.psi_p - psi
+
+    def __filletSpherical(self, gear1, gear2, cD, alpha):
+        betac = alpha - gear2.tita_Tc
+        betag = - (gear2.Rp * betac + (cD.pp / 2)) / gear1.Rp
+        gamma = arccos(cos(gear2.gamma_Tc) * cos(cD.Sigma) + sin(gear2.gamma_Tc) * sin(cD.Sigma) * cos(alpha))
+        tita  = -arctan((sin(gear2.gamma_Tc) * sin(cD.Sigma) * sin(alpha)) / (cos(gear2.gamma_Tc) - cos(cD.Sigma) * cos(gamma))) - betag
+        return gamma, tita
+
+    def __sphericalPoints(self, cD, gamma, tita):
+        return vstack([cD.lambda_ * sin(gamma) * cos(tita), cD.lambda_ * sin(gamma) * sin(tita), cD.lambda_ * cos(gamma)])
+
     def __tip(self, gear1):
         tita = linspace(-gear1.tita_T, gear1.tita_T, 3)
         x = gear1.RT * cos(tita)
@@ -186,6 +149,10 @@ class getProfile_b():
     def __gammaComparation(self, gear1, gear2, cD, alpha):
         gamma = arccos(cos(gear2.gamma_Tc) * cos(cD.Sigma) + sin(gear2.gamma_Tc) * sin(cD.Sigma) * cos(alpha))
         return gamma - gear1.gamma_c
+
+    def __diffGammaComparation(self, gear1, gear2, cD, alpha):
+        gamma = arccos(cos(gear2.gamma_Tc) * cos(cD.Sigma) + sin(gear2.gamma_Tc) * sin(cD.Sigma) * cos(alpha))
+        return sin(gear2.gamma_Tc) * sin(cD.Sigma) * sin(alpha) / sin(gamma)
     
     def __fusionpoint(self, points1, points2):
         fusion_p = (points1[:, -1] + points2[:, 0]) / 2
@@ -199,8 +166,12 @@ class mainCalculations_b():
 
         self.__get_load_commonData1(cD, inputData)
 
-        self.__get_load_gearData1(gear1, cD, inputData.N_m, inputData.deltatp)
-        self.__get_load_gearData1(gear2, cD, inputData.N_s, -gear1.deltatp)
+        # gear2 takes the master clearance and addendum unless its own values are given
+        c_s = inputData.c if inputData.c_slave is None else inputData.c_slave
+        addendum_s = inputData.addendum if inputData.addendum_slave is None else inputData.addendum_slave
+
+        self.__get_load_gearData1(gear1, cD, inputData.N_m, inputData.deltatp, inputData.c, inputData.addendum)
+        self.__get_load_gearData1(gear2, cD, inputData.N_s, -gear1.deltatp, c_s, addendum_s)
 
         self.__get_load_commonData2(cD, gear1, gear2)
 
@@ -230,15 +201,18 @@ class mainCalculations_b():
         cD.Sigma = inputData.Sigma * pi / 180
         cD.c = inputData.c
         cD.n = inputData.n
+        cD.tol = inputData.tol
         cD.iL = inputData.iL
         cD.addendum = inputData.addendum
         cD.pp = pi * cD.m
         cD.pb = cD.pp / sqrt(1 + tan(cD.rho)**2)
         cD.pd = 1 / cD.m
 
-    def __get_load_gearData1(self, gear1, cD, N, deltatp):
+    def __get_load_gearData1(self, gear1, cD, N, deltatp, c, addendum):
         gear1.N = N
         gear1.deltatp = deltatp
+        gear1.c = c
+        gear1.addendum = addendum
         gear1.Rp = gear1.N * cD.m / 2
         gear1.Rb = gear1.Rp / sqrt(1 + tan(cD.rho)**2)
 
@@ -258,8 +232,8 @@ class mainCalculations_b():
         gear1.tb = gear1.Rb * (gear1.tp / gear1.Rp + 2 * gear1.psi_p)
 
     def __get_load_gearData3(self, gear1, cD):
-        gear1.delta_a = cD.m / cD.lambda_  + cD.delta_addendum
-        gear1.delta_d = gear1.delta_a + cD.delta_c 
+        gear1.delta_a = gear1.addendum * cD.m / cD.lambda_
+        gear1.delta_d = (1 + gear1.c) * cD.m / cD.lambda_
         gear1.gamma_T = gear1.gamma_p + gear1.delta_a 
         gear1.gamma_root = gear1.gamma_p - gear1.delta_d
 
@@ -270,7 +244,7 @@ class mainCalculations_b():
         gear1.tpc = cD.pp - gear2.tp
         gear1.tbc = gear1.Rb * (gear1.tpc / gear1.Rp + 2 * gear1.psi_p)
 
-        gear1.gamma_Tc = gear1.gamma_T + cD.delta_c
+        gear1.gamma_Tc = gear1.gamma_p + (1 + gear2.c) * cD.m / cD.lambda_
         gear1.RTc = cD.lambda_ * sin(gear1.gamma_Tc)
 
         gear2.gamma_root2 = cD.Sigma - gear1.gamma_Tc
@@ -344,6 +318,9 @@ class inputDataClass_b:
     n: int
     iL: float
     addendum : float = 1
+    c_slave: float = None
+    addendum_slave: float = None
+    tol: float = 0.0
 
 @dataclass
 class commonData_b:
@@ -371,6 +348,8 @@ class commonData_b:
     mc: float = 0.0
     # Number of Point on curves
     n: int = 0
+    # Tolerance of the interpolated curves, with 0 they take n points (mm)
+    tol: float = 0.0
     FourthCond: bool = False
     lambda_: float = 0.0
     thickness: float = 0.0
@@ -382,6 +361,10 @@ class gearData_b:
     N: int = 0
     # 3D printer offset (mm)
     offset: float = 0
+    # Clearance coefficient
+    c: float = 0.0
+    # Addendum coefficient
+    addendum: float = 1.0
     # Pitch Circle Radius (mm)
     Rp: float = 0.0
     # Base Circle Radius (mm)
@@ -440,6 +423,11 @@ class gearData_b:
     tita_T: float = 0.0
     # Angle where root curve start
     tita_root: float = 0.0
+    # Number of points on the involute and fillet curves
+    n_involute: int = 0
+    n_fillet: int = 0
+    # Maximum deviation of the interpolated involute and fillet curves (mm)
+    deviation: float = 0.0
 
     FirstCond: bool = False
     SecondCond: bool = False
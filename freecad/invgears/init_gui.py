@@ -41,11 +41,12 @@ class InvGears(Gui.Workbench):
         from freecad.invgears import newSlaveBevelCmd
         from freecad.invgears import newAnimatorCmd
         from freecad.invgears import newSVGCmd
+        from freecad.invgears import newClearCacheCmd
 
         self.list_commands = ["CreateMasterGear", "AddSlaveGear", "AddSlaveMasterGear", "CreateInternalGear", "CreateMasterBevelGear", "AddSlaveBevelGear", "Animator", "CreateGearsInSVG"]
 
         self.appendToolbar("Involute Gears", self.list_commands)
-        self.appendMenu("Involute Gears", self.list_commands)
+        self.appendMenu("Involute Gears", self.list_commands + ["Separator", "ClearShapesCache"])
         App.Console.PrintLog("Loading InvGears... done\n")
 
     def Activated(self):
@@ -0,0 +1,43 @@
+# ***************************************************************************
+# *   Copyright (c) 2021 Sebastian Ernesto García <sebasg@outlook.com>      *
+# *                                                                         *
+# *   newClearCacheCmd.py                                                   *
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Lesser General Public License for more details.                   *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+import FreeCAD as App
+import FreeCADGui as Gui
+
+from freecad.invgears.diskCache import clearShapes, cacheDirectory
+
+
+class makeClearCacheCmd():
+    def GetResources(self):
+        return {"MenuText": "Clear shapes cache",
+                "ToolTip": "Remove the gear shapes saved on disk, they are built again when they are needed"}
+
+    def IsActive(self):
+        return True
+
+    def Activated(self):
+        clearShapes()
+        App.Console.PrintMessage("InvGears: shapes cache cleared in {}\n".format(cacheDirectory()))
+
+
+Gui.addCommand('ClearShapesCache', makeClearCacheCmd())
@@ -27,6 +27,7 @@ import os
 from PySide.QtWidgets import QDialogButtonBox
 
 from freecad.invgears.featureClasses import InternalGear, SlaveGear, ViewProviderInternalGear, ViewProviderSlaveGear
+from freecad.invgears.gearTrain import recomputeTrain
 
 
 class InternalGearTaskPanel:
@@ -82,7 +83,6 @@ class InternalGearTaskPanel:
         body_internal.addObject(fp_internal)
         ViewProviderInternalGear(fp_internal.ViewObject)
         InternalGear(fp_internal, self.form)
-        App.activeDocument().recompute()
 
         list_s_gear = "[" + self.form[0].lineEdit.text() + "]"
         if list_s_gear:
@@ -96,8 +96,8 @@ class InternalGearTaskPanel:
                 body_slave.addObject(fp_slave)
                 ViewProviderSlaveGear(fp_slave.ViewObject)
                 SlaveGear(fp_slave, fp_internal, angle)
-                App.activeDocument().recompute()
 
+        recomputeTrain(App.activeDocument(), [fp_internal])
         Gui.SendMsgToActiveView("ViewFit")
 
 
@@ -27,6 +27,7 @@ import os
 from PySide.QtWidgets import QDialogButtonBox
 
 from freecad.invgears.featureClasses import MasterBevelGear, SlaveBevelGear, ViewProviderMasterBevelGear, ViewProviderSlaveBevelGear
+from freecad.invgears.gearTrain import recomputeTrain
 
 
 class MasterBevelGearTaskPanel:
@@ -82,7 +83,6 @@ class MasterBevelGearTaskPanel:
         body_master.addObject(fp_master)
         ViewProviderMasterBevelGear(fp_master.ViewObject)
         MasterBevelGear(fp_master, self.form)
-        App.activeDocument().recompute()
 
         list_s_gear = "[" + self.form[0].lineEdit.text() + "]"
         if list_s_gear:
@@ -96,8 +96,8 @@ class MasterBevelGearTaskPanel:
                 body_slave.addObject(fp_slave)
                 ViewProviderSlaveBevelGear(fp_slave.ViewObject)
                 SlaveBevelGear(fp_slave, fp_master, angle)
-                App.activeDocument().recompute()
 
+        recomputeTrain(App.activeDocument(), [fp_master])
         Gui.SendMsgToActiveView("ViewFit")
 
 
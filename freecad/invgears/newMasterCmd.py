@@ -27,6 +27,7 @@ import os
 
 from PySide.QtWidgets import QDialogButtonBox
 from freecad.invgears.featureClasses import MasterGear, SlaveGear, ViewProviderMasterGear, ViewProviderSlaveGear
+from freecad.invgears.gearTrain import recomputeTrain
 
 
 class MasterGearTaskPanel:
@@ -78,7 +79,6 @@ class MasterGearTaskPanel:
         body_master.addObject(fp_master)
         ViewProviderMasterGear(fp_master.ViewObject)
         MasterGear(fp_master, self.form)
-        App.activeDocument().recompute()
 
         list_s_gear = "[" + self.form[0].lineEdit.text() + "]"
         if list_s_gear:
@@ -92,8 +92,8 @@ class MasterGearTaskPanel:
                 body_slave.addObject(fp_slave)
                 ViewProviderSlaveGear(fp_slave.ViewObject)
                 SlaveGear(fp_slave, fp_master, angle)
-                App.activeDocument().recompute()
 
+        recomputeTrain(App.activeDocument(), [fp_master])
         Gui.SendMsgToActiveView("ViewFit")
 
 
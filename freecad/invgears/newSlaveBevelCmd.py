@@ -28,6 +28,7 @@ from PySide6.QtWidgets import QDialogButtonBox
 
 from freecad.invgears.featureClasses import SlaveBevelGear, ViewProviderSlaveBevelGear
 from freecad.invgears.observers import SelObserver
+from freecad.invgears.gearTrain import recomputeTrain
 
 
 class SlaveBevelGearTaskPanel:
@@ -67,6 +68,7 @@ class SlaveBevelGearTaskPanel:
                 part_gears = part
         angle_list = self.form[0].lineEdit_2.text()
         list_s_gear = "[" + angle_list + "]"
+        new_fps = []
         if list_s_gear:
             for angle in eval(list_s_gear):
                 part_slave = App.activeDocument().addObject('App::Part','Part_Slave_Bevel')
@@ -78,8 +80,9 @@ class SlaveBevelGearTaskPanel:
                 body_slave.addObject(fp_slave)
                 ViewProviderSlaveBevelGear(fp_slave.ViewObject)
                 SlaveBevelGear(fp_slave, fp_master, angle)
-                App.activeDocument().recompute()
+                new_fps.append(fp_slave)
 
+        recomputeTrain(App.activeDocument(), new_fps)
         Gui.SendMsgToActiveView("ViewFit")
 
 
@@ -28,6 +28,7 @@ from PySide.QtWidgets import QDialogButtonBox
 
 from freecad.invgears.featureClasses import SlaveMasterGear, ViewProviderSlaveMasterGear
 from freecad.invgears.observers import SelObserver
+from freecad.invgears.gearTrain import recomputeTrain
 
 
 class SlaveMasterGearTaskPanel:
@@ -90,6 +91,7 @@ class SlaveMasterGearTaskPanel:
                 part_gears = part
         angle_list = self.form[0].lineEdit_2.text()
         list_s_gear = "[" + angle_list + "]"
+        new_fps = []
         if list_s_gear:
             for angle in eval(list_s_gear):
                 part_slave_master = App.activeDocument().addObject('App::Part','Part_Slave_Master')
@@ -102,8 +104,9 @@ class SlaveMasterGearTaskPanel:
                 body_slave_master.addObject(fp_slave_master)
                 ViewProviderSlaveMasterGear(fp_slave_master.ViewObject)
                 SlaveMasterGear(fp_slave_master, fp_master, self.form, angle)
-                App.activeDocument().recompute()
+                new_fps.append(fp_slave_master)
 
+        recomputeTrain(App.activeDocument(), new_fps)
         Gui.SendMsgToActiveView("ViewFit")
 
 
@@ -0,0 +1,191 @@
+# ***************************************************************************
+# *   Copyright (c) 2021 Sebastian Ernesto García <sebasg@outlook.com>      *
+# *                                                                         *
+# *   profileCache.py                                                       *
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Lesser General Public License for more details.                   *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+from collections import OrderedDict
+from copy import copy
+from dataclasses import astuple, replace
+from hashlib import sha1
+
+from numpy import ndarray
+from freecad.invgears.gears import commonData, gearData, mainCalculations, getProfile, segmentViews
+from freecad.invgears.gears_bevel import commonData_b, gearData_b, mainCalculations_b, getProfile_b
+
+
+# Every length of the calculations scales linearly with the module when deltaCs, Bl, deltatp, offsets and
+# the bevel thickness scale with it too, so the cache keeps the gears calculated with m = 1 and the
+# requested module is served multiplying these fields.
+lengthFields = ('m', 'Center_d', 'Cs', 'deltaCs', 'pp', 'ps', 'pb', 'B', 'Bl', 'lambda_', 'thickness',
+                'Rp', 'Rs', 'Rb', 'RT', 'Rroot', 'RL', 'Rf', 'Ru', 'Rc', 'RTc', 'Rroot2', 'tp', 'ts', 'tb', 'tT',
+                'tpc', 'tsc', 'tbc', 'tTc', 'e', 'deltatp', 'ap', 'as_', 'apc', 'bp', 'bs', 'offset', 'z_T', 'z_root', 'tol', 'deviation')
+inverseLengthFields = ('pd',)
+profileFields = {'profile_array': 'profile', 'profile_onPlane_array': 'profile_onPlane', 'profile2_array': 'profile2'}
+
+
+def normalizeInput(inputData):
+    m = inputData.m
+    if hasattr(inputData, 'deltaCs'):
+        fields = ('Bl', 'deltaCs', 'deltatp', 'offset_m', 'offset_s', 'tol')
+    else:
+        fields = ('Bl', 'thickness', 'deltatp', 'tol')
+    values = {field: round(getattr(inputData, field) / m, 12) for field in fields}
+    # without per-gear values the slave uses the master ones, both inputs share the same entry
+    if inputData.c_slave is None:
+        values['c_slave'] = inputData.c
+    if inputData.addendum_slave is None:
+        values['addendum_slave'] = inputData.addendum
+    return replace(inputData, m=1.0, **values)
+
+
+def scaleData(data, m):
+    scaled = copy(data)
+    for field in lengthFields:
+        if field in vars(data):
+            setattr(scaled, field, getattr(data, field) * m)
+    for field in inverseLengthFields:
+        if field in vars(data):
+            setattr(scaled, field, getattr(data, field) / m)
+    if 'tooth_profile' in vars(data):
+        scaled.tooth_profile = [segment * m for segment in data.tooth_profile]
+    for field, views in profileFields.items():
+        if field in vars(data):
+            setattr(scaled, field, getattr(data, field) * m)
+            setattr(scaled, views, segmentViews(getattr(scaled, field), data.segments))
+    return scaled
+
+
+def cacheKey(inputData, internal=False, bevel=False):
+    values = tuple(repr(float(value)) for value in astuple(inputData))
+    return sha1(repr((type(inputData).__name__, values, internal, bevel)).encode()).hexdigest()
+
+
+class gearsCache():
+    # LRU cache of (cD, master, slave) tuples. The size of an entry is the memory of its numpy arrays
+    def __init__(self, maxBytes=128 * 2**20):
+        self.maxBytes = maxBytes
+        self.entries = OrderedDict()
+        self.sizes = {}
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses = self.misses + 1
+        else:
+            self.hits = self.hits + 1
+            self.entries.move_to_end(key)
+        return entry
+
+    def put(self, key, entry):
+        if key in self.entries:
+            self.nbytes = self.nbytes - self.sizes[key]
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        self.update(key)
+
+    def update(self, key):
+        # recalculates the size of an entry after its profiles were added
+        if key in self.sizes:
+            self.nbytes = self.nbytes - self.sizes[key]
+        self.sizes[key] = sum(self.__arraysBytes(data) for data in self.entries[key])
+        self.nbytes = self.nbytes + self.sizes[key]
+        while self.nbytes > self.maxBytes and len(self.entries) > 1:
+            oldKey, oldEntry = self.entries.popitem(last=False)
+            self.nbytes = self.nbytes - self.sizes.pop(oldKey)
+
+    def clear(self):
+        self.entries.clear()
+        self.sizes.clear()
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __arraysBytes(self, data):
+        return sum(value.nbytes for value in vars(data).values() if isinstance(value, ndarray) and value.base is None)
+
+
+cache = gearsCache()
+
+
+def internalInputs(inputData):
+    # the ring of an internal pair is cut by a pinion with the ring clearance and addendum and the pinion by
+    # a ring with its own ones, so with different values each gear is solved in its own pass. None when
+    # both gears have the same values
+    c_s = inputData.c if inputData.c_slave is None else inputData.c_slave
+    addendum_s = inputData.addendum if inputData.addendum_slave is None else inputData.addendum_slave
+    if c_s == inputData.c and addendum_s == inputData.addendum:
+        return None
+    ringInput = replace(inputData, c_slave=inputData.c, addendum_slave=inputData.addendum)
+    pinionInput = replace(inputData, c=c_s, addendum=addendum_s)
+    return ringInput, pinionInput
+
+
+def getGears(inputData, internal=False, bevel=False, masterProfile=True, slaveProfile=True):
+    # The cache keeps the dimensionless gears (m = 1), each call returns copies scaled to inputData.m.
+    # Profiles are calculated the first time they are requested.
+    if internal is True and bevel is False:
+        inputs = internalInputs(inputData)
+        if inputs is not None:
+            cD, master, slave = getGears(inputs[0], True, False, masterProfile, False)
+            slave = getGears(inputs[1], True, False, False, slaveProfile)[2]
+            return cD, master, slave
+    m = inputData.m
+    inputData = normalizeInput(inputData)
+    key = cacheKey(inputData, internal, bevel)
+    entry = cache.get(key)
+    if entry is None:
+        if bevel:
+            cD = commonData_b()
+            master = gearData_b()
+            slave = gearData_b()
+            mainCalculations_b(inputData, cD, master, slave)
+        else:
+            cD = commonData()
+            master = gearData()
+            slave = gearData()
+            mainCalculations(inputData, cD, master, slave, internal)
+        entry = (cD, master, slave)
+        cache.put(key, entry)
+
+    cD, master, slave = entry
+    changed = False
+    if masterProfile and not hasattr(master, "profile"):
+        if bevel:
+            getProfile_b(master, slave, cD)
+        else:
+            getProfile(master, slave, cD, internal)
+        changed = True
+    if slaveProfile and not hasattr(slave, "profile"):
+        if bevel:
+            getProfile_b(slave, master, cD)
+        else:
+            getProfile(slave, master, cD)
+        changed = True
+    if changed:
+        cache.update(key)
+
+    return tuple(scaleData(data, m) for data in entry)
@@ -21,80 +21,133 @@
 # *                                                                         *
 # ***************************************************************************
 
-from numpy import pi
+from hashlib import sha1
+
+from numpy import pi, isnan
 from freecad.invgears.functions import getPartFromFPSlave, getPartFromFPBevelSlave
 
 
-def loadProperties(fp, cD, gear, pinion, bevel=False):
+def setChanged(fp, name, value, tol=1e-9):
+    # every write touches fp and marks its dependents, so the values that did not change are not written
+    current = getattr(fp, name)
+    current = getattr(current, 'Value', current)
+    if isinstance(current, bool):
+        changed = current != bool(value)
+    elif isnan(current) or isnan(value):
+        # Ru is nan whenever there is no undercut
+        changed = not (isnan(current) and isnan(value))
+    else:
+        changed = not abs(current - value) <= tol * max(1.0, abs(value))
+    if changed:
+        setattr(fp, name, value)
+
+
+def setWire(fp, W):
+    # the slave wire is replaced only when its geometry hash changes
+    key = sha1(W.exportBrepToString().encode()).hexdigest()
+    if key != getattr(fp.Proxy, 'wireHash', None) or fp.W_s.isNull():
+        fp.W_s = W
+        fp.Proxy.wireHash = key
+
+
+def loadProperties(fp, cD, gear, pinion, bevel=False, internal=False):
+    # an internal pair reports the distance between the centers and the orientation of its pinion inside the ring
     if bevel is True:
-        fp.lambda_.Value = cD.lambda_
-    fp.phi_p.Value = cD.phi_p * 180 / pi
+        setChanged(fp, 'lambda_', cD.lambda_)
+    setChanged(fp, 'phi_p', cD.phi_p * 180 / pi)
     if bevel is False:
-        fp.psi_s.Value = cD.psi_s * 180 / pi
-    fp.psi_p.Value = cD.psi_p * 180 / pi
+        setChanged(fp, 'psi_s', cD.psi_s * 180 / pi)
+    setChanged(fp, 'psi_p', cD.psi_p * 180 / pi)
     if bevel is False:
-        fp.Cs.Value = cD.Cs
-        fp.Center_d.Value = cD.Center_d
-        fp.ps.Value = cD.ps
-    fp.pp.Value = cD.pp
-    fp.pb.Value = cD.pb
-    fp.pd.Value = cD.pd
-    fp.B.Value = cD.B
-    fp.mc = cD.mc
-    fp.FourthCond = cD.FourthCond
+        if internal is True:
+            setChanged(fp, 'Cs', abs(gear.Rs - pinion.Rs))
+            setChanged(fp, 'Center_d', abs(gear.Rp - pinion.Rp))
+        else:
+            setChanged(fp, 'Cs', cD.Cs)
+            setChanged(fp, 'Center_d', cD.Center_d)
+        setChanged(fp, 'ps', cD.ps)
+    setChanged(fp, 'pp', cD.pp)
+    setChanged(fp, 'pb', cD.pb)
+    setChanged(fp, 'pd', cD.pd)
+    setChanged(fp, 'B', cD.B)
+    setChanged(fp, 'mc', cD.mc)
+    setChanged(fp, 'FourthCond', cD.FourthCond)
+    setChanged(fp, 'deviation', max(gear.deviation, pinion.deviation))
 
     if bevel is False:
-        fp.Rs_m.Value = gear.Rs
-    fp.Rp_m.Value = gear.Rp
-    fp.Rb_m.Value = gear.Rb
-    fp.RT_m.Value = gear.RT
-    fp.Rroot_m.Value = gear.Rroot
-    fp.RL_m.Value = gear.RL
-    fp.Rf_m.Value = gear.Rf
-    fp.Ru_m.Value = gear.Ru
+        setChanged(fp, 'Rs_m', gear.Rs)
+    setChanged(fp, 'Rp_m', gear.Rp)
+    setChanged(fp, 'Rb_m', gear.Rb)
+    setChanged(fp, 'RT_m', gear.RT)
+    setChanged(fp, 'Rroot_m', gear.Rroot)
+    setChanged(fp, 'RL_m', gear.RL)
+    setChanged(fp, 'Rf_m', gear.Rf)
+    setChanged(fp, 'Ru_m', gear.Ru)
     if bevel is False:
-        fp.ts_m.Value = gear.ts
-    fp.tp_m.Value = gear.tp
-    fp.tb_m.Value = gear.tb
-    fp.tT_m.Value = gear.tT
+        setChanged(fp, 'ts_m', gear.ts)
+    setChanged(fp, 'tp_m', gear.tp)
+    setChanged(fp, 'tb_m', gear.tb)
+    setChanged(fp, 'tT_m', gear.tT)
     if bevel is False:
-        fp.e_m.Value = gear.e
-        fp.as_m.Value = gear.as_
-    fp.ap_m.Value = gear.ap
+        setChanged(fp, 'e_m', gear.e)
+        setChanged(fp, 'as_m', gear.as_)
+    setChanged(fp, 'ap_m', gear.ap)
     if bevel is False:
-        fp.bs_m.Value = gear.bs
-    fp.bp_m.Value = gear.bp
-    fp.FirstCond_m = gear.FirstCond
-    fp.SecondCond_m = gear.SecondCond
-    fp.ThirdCond_m = gear.ThirdCond
+        setChanged(fp, 'bs_m', gear.bs)
+    setChanged(fp, 'bp_m', gear.bp)
+    setChanged(fp, 'FirstCond_m', gear.FirstCond)
+    setChanged(fp, 'SecondCond_m', gear.SecondCond)
+    setChanged(fp, 'ThirdCond_m', gear.ThirdCond)
 
     if bevel is False:
-        fp.Rs_s.Value = pinion.Rs
-    fp.Rp_s.Value = pinion.Rp
-    fp.Rb_s.Value = pinion.Rb
-    fp.RT_s.Value = pinion.RT
-    fp.Rroot_s.Value = pinion.Rroot
-    fp.RL_s.Value = pinion.RL
-    fp.Rf_s.Value = pinion.Rf
-    fp.Ru_s.Value = pinion.Ru
+        setChanged(fp, 'Rs_s', pinion.Rs)
+    setChanged(fp, 'Rp_s', pinion.Rp)
+    setChanged(fp, 'Rb_s', pinion.Rb)
+    setChanged(fp, 'RT_s', pinion.RT)
+    setChanged(fp, 'Rroot_s', pinion.Rroot)
+    setChanged(fp, 'RL_s', pinion.RL)
+    setChanged(fp, 'Rf_s', pinion.Rf)
+    setChanged(fp, 'Ru_s', pinion.Ru)
     if bevel is False:
-        fp.ts_s.Value = pinion.ts
-    fp.tp_s.Value = pinion.tp
-    fp.tb_s.Value = pinion.tb
-    fp.tT_s.Value = pinion.tT
+        setChanged(fp, 'ts_s', pinion.ts)
+    setChanged(fp, 'tp_s', pinion.tp)
+    setChanged(fp, 'tb_s', pinion.tb)
+    setChanged(fp, 'tT_s', pinion.tT)
     if bevel is False:
-        fp.e_s.Value = pinion.e
-        fp.as_s.Value = pinion.as_
-    fp.ap_s.Value = pinion.ap
+        setChanged(fp, 'e_s', pinion.e)
+        setChanged(fp, 'as_s', pinion.as_)
+    setChanged(fp, 'ap_s', pinion.ap)
     if bevel is False:
-        fp.bs_s.Value = pinion.bs
-    fp.bp_s.Value = pinion.bp
-    fp.angle_s.Value = pinion.beta0 * 180 / pi
-    fp.FirstCond_s = pinion.FirstCond
-    fp.SecondCond_s = pinion.SecondCond
-    fp.ThirdCond_s = pinion.ThirdCond
-
-def addMasterProperties(fp, widget1, widget2, bevel=False):
+        setChanged(fp, 'bs_s', pinion.bs)
+    setChanged(fp, 'bp_s', pinion.bp)
+    if internal is True:
+        setChanged(fp, 'angle_s', pinion.beta0 * 180 / pi - 180 + 180 / pinion.N)
+    else:
+        setChanged(fp, 'angle_s', pinion.beta0 * 180 / pi)
+    setChanged(fp, 'FirstCond_s', pinion.FirstCond)
+    setChanged(fp, 'SecondCond_s', pinion.SecondCond)
+    setChanged(fp, 'ThirdCond_s', pinion.ThirdCond)
+
+def addBuildMode(fp, slaveOnly=False):
+    # internal and slave-master gears are always built from their profile, their build mode is only used
+    # for the solid of their slave gears
+    if slaveOnly is True:
+        doc = 'Slave gear solid from the whole profile or from one tooth cell replicated around the axis, this gear is always built from the whole profile'
+    else:
+        doc = 'Solid from the whole profile or from one tooth cell replicated around the axis'
+    fp.addProperty('App::PropertyEnumeration', 'buildMode', '1 - Gears Parameters', doc).buildMode = ["Profile", "Tooth cells", "Tooth cells fused"]
+
+def addHelicalMode(fp):
+    # the first mode, Sweep, is the one of the features made before the loft
+    fp.addProperty('App::PropertyEnumeration', 'helicalMode', '1 - Gears Parameters', 'Helical solid, sweep along a helix or loft through rotated sections').helicalMode = ["Sweep", "Loft"]
+
+def addTolerance(fp):
+    fp.addProperty('App::PropertyLength', 'tolerance', '2 - Additional Parameters', 'Curves tolerance, 0 uses n points and otherwise n is the maximum of every curve').tolerance = 0
+
+def addDeviation(fp):
+    fp.addProperty('App::PropertyLength', 'deviation', '3 - Common data', 'Maximum deviation of the curves', 1)
+
+def addMasterProperties(fp, widget1, widget2, bevel=False, slaveOnly=False):
         fp.addProperty('App::PropertyLength', 'm', '1 - Gears Parameters', 'Module').m = widget1.doubleSpinBox.text()
         if bevel is False:
             fp.addProperty('App::PropertyAngle', 'phi_s', '1 - Gears Parameters', 'Standard pressure angle').phi_s = widget1.doubleSpinBox_2.text()
@@ -108,6 +161,8 @@ def addMasterProperties(fp, widget1, widget2, bevel=False):
             fp.addProperty('App::PropertyEnumeration', 'gearType', '1 - Gears Parameters', 'Gear type').gearType = ["Spur", "Helical", "Double Helical"]
             fp.gearType = widget1.comboBox.currentText()
             fp.addProperty('App::PropertyFloat', 'helicalPortion', '1 - Gears Parameters', 'Helical portion').helicalPortion = widget1.doubleSpinBox_4.value()
+            addHelicalMode(fp)
+        addBuildMode(fp, slaveOnly)
         fp.addProperty('App::PropertyLength', 'thickness', '1 - Gears Parameters', 'Gear thickness').thickness = widget1.doubleSpinBox_5.text()
         if bevel is True:
             fp.addProperty('App::PropertyAngle', 'Sigma', '1 - Gears Parameters', 'Angle between gear axes').Sigma = widget1.doubleSpinBox_6.text()
@@ -125,6 +180,7 @@ def addMasterProperties(fp, widget1, widget2, bevel=False):
             fp.addProperty('App::PropertyDistance', 'offset_m', '2 - Additional Parameters', 'Offset for master gear').offset_m = widget2.doubleSpinBox_4.text()
             fp.addProperty('App::PropertyDistance', 'offset_s', '2 - Additional Parameters', 'Offset for slave gear').offset_s = widget2.doubleSpinBox_5.text()
         fp.addProperty('App::PropertyInteger', 'n', '2 - Additional Parameters', 'Number of points on the curves').n = widget2.spinBox.value()
+        addTolerance(fp)
         fp.addProperty('App::PropertyFloat', 'iL', '2 - Additional Parameters', 'Limit of second Interference').iL = widget2.doubleSpinBox_6.value()
         
         if bevel is True:
@@ -143,6 +199,7 @@ def addMasterProperties(fp, widget1, widget2, bevel=False):
         fp.addProperty('App::PropertyLength', 'B', '3 - Common data', 'Circular Backlash', 1)
         fp.addProperty('App::PropertyFloat', 'mc', '3 - Common data', 'Contact Ratio', 1)
         fp.addProperty('App::PropertyBool', 'FourthCond', '3 - Common data', 'Fourth Condition', 1)
+        addDeviation(fp)
         
         if bevel is False:
             fp.addProperty('App::PropertyLength', 'Rs_m', '4 - Master gear data', 'Standard Pitch Circle Radius', 1)
@@ -196,6 +253,17 @@ def addMasterProperties(fp, widget1, widget2, bevel=False):
         fp.addProperty('App::PropertyBool', 'ThirdCond_s', '5 - Slave gear data', 'Third Condition', 1)
         fp.addProperty('Part::PropertyPartShape', 'W_s', '5 - Slave gear data', 'Pinion Wire', 1)
 
+def restoreMasterProperties(fp):
+    # documents saved by older versions do not have the properties added since, they get their defaults
+    if 'tolerance' not in fp.PropertiesList:
+        addTolerance(fp)
+    if 'deviation' not in fp.PropertiesList:
+        addDeviation(fp)
+    if 'gearType' in fp.PropertiesList and 'helicalMode' not in fp.PropertiesList:
+        addHelicalMode(fp)
+    if 'buildMode' not in fp.PropertiesList:
+        addBuildMode(fp, fp.Proxy.Type in ('internalGear', 'slaveMasterGear'))
+
 def addSlaveProperties(fp, fp_master, angle):
     fp.addProperty('App::PropertyLinkGlobal', 'fp_master', 'Slave gear data', 'Master Feature Python').fp_master = fp_master
     fp.addProperty('App::PropertyBool', 'attachToMaster', 'Slave gear data', 'Attach to master').attachToMaster = True
@@ -204,20 +272,6 @@ def addSlaveProperties(fp, fp_master, angle):
 
 def addAdditionalProperties(fp):
     part_slave = getPartFromFPBevelSlave(fp)
-    part_slave.addProperty('App::PropertyPrecision', 'q1z', 'Position Calculus', 'z value of q1', 4)
-    part_slave.addProperty('App::PropertyPrecision', 'q1w', 'Position Calculus', 'w value of q1', 4)
-
-    part_slave.addProperty('App::PropertyPrecision', 'q2y', 'Position Calculus', 'y value of q2', 4)
-    part_slave.addProperty('App::PropertyPrecision', 'q2w', 'Position Calculus', 'w value of q2', 4)
-
-    part_slave.addProperty('App::PropertyPrecision', 'q3z', 'Position Calculus', 'z value of q3', 4)
-    part_slave.addProperty('App::PropertyPrecision', 'q3w', 'Position Calculus', 'w value of q3', 4)
-    
-    part_slave.addProperty('App::PropertyPrecision', 'qrx', 'Position Calculus', 'x value of qr', 4)
-    part_slave.addProperty('App::PropertyPrecision', 'qry', 'Position Calculus', 'y value of qr', 4)
-    part_slave.addProperty('App::PropertyPrecision', 'qrz', 'Position Calculus', 'z value of qr', 4)
-    part_slave.addProperty('App::PropertyPrecision', 'qrw', 'Position Calculus', 'w value of qr', 4)
-
     part_slave.addProperty('App::PropertyAngle', 'rotationAxis', 'Positions', 'Rotation about axis')
     part_slave.addProperty('App::PropertyDistance', 'xPos', 'Positions', 'x position')
     part_slave.addProperty('App::PropertyDistance', 'yPos', 'Positions', 'x position')    
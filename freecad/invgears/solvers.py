@@ -0,0 +1,131 @@
+# ***************************************************************************
+# *   Copyright (c) 2021 Sebastian Ernesto García <sebasg@outlook.com>      *
+# *                                                                         *
+# *   solvers.py                                                            *
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Lesser General Public License for more details.                   *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+# Root finders shared by gears.py and gears_bevel.py.
+# a and b can be scalars or numpy arrays of brackets, every bracket is solved at once and the
+# iteration stops when all of them converged. Brackets without sign change return -1.
+# func(gear1, gear2, cD, x) is the comparation function and dfunc(gear1, gear2, cD, x) its derivative.
+
+from numpy import where, minimum, copysign, broadcast_arrays, errstate, isnan, ndim
+
+
+def _result(root, scalar):
+    if scalar:
+        return root[()]
+    return root
+
+
+def _bracket(func, gear1, gear2, cD, a, b):
+    scalar = ndim(a) == 0 and ndim(b) == 0
+    a, b = broadcast_arrays(a, b)
+    a = a.astype(float)
+    b = b.astype(float)
+    fa = func(gear1, gear2, cD, a) + 0 * a
+    fb = func(gear1, gear2, cD, b) + 0 * b
+    valid = ~(((fa > 0) & (fb > 0)) | ((fa < 0) & (fb < 0)) | isnan(fa) | isnan(fb))
+    return scalar, a, b, fa, fb, valid
+
+
+def brent(func, gear1, gear2, cD, a, b, xtol=1e-8, rtol=1.e-12, maxIter=100):
+    with errstate(invalid='ignore', divide='ignore'):
+        scalar, a, b, fa, fb, valid = _bracket(func, gear1, gear2, cD, a, b)
+        root = where(valid, b, -1.0)
+        active = valid.copy()
+        c = b.copy()
+        fc = fb.copy()
+        d = b - a
+        e = d.copy()
+        for i in range(maxIter):
+            same = ((fb > 0) & (fc > 0)) | ((fb < 0) & (fc < 0))
+            c = where(same, a, c)
+            fc = where(same, fa, fc)
+            d = where(same, b - a, d)
+            e = where(same, d, e)
+
+            swap = abs(fc) < abs(fb)
+            a, b, c = where(swap, b, a), where(swap, c, b), where(swap, b, c)
+            fa, fb, fc = where(swap, fb, fa), where(swap, fc, fb), where(swap, fb, fc)
+
+            tol1 = 2 * rtol * abs(b) + 0.5 * xtol
+            xm = 0.5 * (c - b)
+            converged = active & ((abs(xm) <= tol1) | (fb == 0))
+            root = where(converged, b, root)
+            active = active & ~converged
+            if not active.any():
+                break
+
+            s = fb / fa
+            secant = a == c
+            q = fa / fc
+            r = fb / fc
+            p = where(secant, 2 * xm * s, s * (2 * xm * q * (q - r) - (b - a) * (r - 1)))
+            q = where(secant, 1 - s, (q - 1) * (r - 1) * (s - 1))
+            q = where(p > 0, -q, q)
+            p = abs(p)
+            interpolate = (abs(e) >= tol1) & (abs(fa) > abs(fb)) & (2 * p < minimum(3 * xm * q - abs(tol1 * q), abs(e * q)))
+            e = where(interpolate, d, xm)
+            d = where(interpolate, p / q, xm)
+
+            a = where(active, b, a)
+            fa = where(active, fb, fa)
+            b = where(active, b + where(abs(d) > tol1, d, copysign(tol1, xm)), b)
+            fb = where(active, func(gear1, gear2, cD, b), fb)
+        root = where(active, b, root)
+    return _result(root, scalar)
+
+
+def newton(func, dfunc, gear1, gear2, cD, a, b, xtol=1e-8, rtol=1.e-12, maxIter=100):
+    # Newton steps safeguarded by bisection, the step is rejected when it leaves the bracket
+    # or when it does not reduce the bracket fast enough
+    with errstate(invalid='ignore', divide='ignore'):
+        scalar, a, b, fa, fb, valid = _bracket(func, gear1, gear2, cD, a, b)
+        root = where(valid, where(fa == 0, a, b), -1.0)
+        active = valid & (fa != 0) & (fb != 0)
+        xl = where(fa < 0, a, b)
+        xh = where(fa < 0, b, a)
+        x = 0.5 * (a + b)
+        dxold = abs(b - a)
+        dx = dxold.copy()
+        f = func(gear1, gear2, cD, x)
+        df = dfunc(gear1, gear2, cD, x)
+        for i in range(maxIter):
+            bisect = (((x - xh) * df - f) * ((x - xl) * df - f) > 0) | (abs(2 * f) > abs(dxold * df)) | ~(abs(df) > 0)
+            dxold = where(active, dx, dxold)
+            dx = where(active, where(bisect, 0.5 * (xh - xl), f / df), dx)
+            x = where(active, where(bisect, xl + dx, x - dx), x)
+
+            converged = active & (abs(dx) <= 2 * rtol * abs(x) + 0.5 * xtol)
+            root = where(converged, x, root)
+            active = active & ~converged
+            if not active.any():
+                break
+
+            f = where(active, func(gear1, gear2, cD, x), f)
+            df = where(active, dfunc(gear1, gear2, cD, x), df)
+            converged = active & (f == 0)
+            root = where(converged, x, root)
+            active = active & ~converged
+            xl = where(active & (f < 0), x, xl)
+            xh = where(active & (f > 0), x, xh)
+        root = where(active, x, root)
+    return _result(root, scalar)
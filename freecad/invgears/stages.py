@@ -0,0 +1,53 @@
+# ***************************************************************************
+# *   Copyright (c) 2021 Sebastian Ernesto García <sebasg@outlook.com>      *
+# *                                                                         *
+# *   stages.py                                                             *
+# *                                                                         *
+# *   This program is free software; you can redistribute it and/or modify  *
+# *   it under the terms of the GNU Lesser General Public License (LGPL)    *
+# *   as published by the Free Software Foundation; either version 2 of     *
+# *   the License, or (at your option) any later version.                   *
+# *   for detail see the LICENCE text file.                                 *
+# *                                                                         *
+# *   This program is distributed in the hope that it will be useful,       *
+# *   but WITHOUT ANY WARRANTY; without even the implied warranty of        *
+# *   MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the         *
+# *   GNU Lesser General Public License for more details.                   *
+# *                                                                         *
+# *   You should have received a copy of the GNU Library General Public     *
+# *   License along with this program; if not, write to the Free Software   *
+# *   Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  *
+# *   USA                                                                   *
+# *                                                                         *
+# ***************************************************************************
+
+
+# Stages of the execute of a feature. Every property marks the stages it affects and execute only reruns
+# the marked ones, so rotating, moving or relabeling a gear never rebuilds its solid
+MATH = 1
+PROFILE = 2
+WIRE = 4
+SOLID = 8
+PLACEMENT = 16
+GEOMETRY = MATH | PROFILE | WIRE | SOLID
+ALL = GEOMETRY | PLACEMENT
+
+# properties that are not in a map (outputs, Label, Placement, Shape, W_s, ...) mark no stage
+masterStages = {
+    'm': GEOMETRY, 'phi_s': GEOMETRY, 'N_m': GEOMETRY, 'N_s': GEOMETRY, 'Bl': GEOMETRY,
+    'addendum_master': GEOMETRY, 'addendum_slave': GEOMETRY, 'c': GEOMETRY, 'c_slave': GEOMETRY,
+    'deltaCs': GEOMETRY, 'deltatp': GEOMETRY, 'offset_m': GEOMETRY, 'offset_s': GEOMETRY, 'iL': GEOMETRY,
+    'n': PROFILE | WIRE | SOLID, 'tolerance': PROFILE | WIRE | SOLID,
+    'gearType': SOLID, 'helicalPortion': SOLID, 'helicalMode': SOLID, 'buildMode': SOLID, 'thickness': SOLID,
+}
+
+# the build mode of internal and slave-master gears is only used for the solid of their slaves
+internalStages = dict(masterStages, extThickness=SOLID, buildMode=0)
+
+# the bevel thickness and the angles change the spherical radius
+masterBevelStages = dict(masterStages, rho=GEOMETRY, thickness=GEOMETRY, Sigma=GEOMETRY)
+
+# every input a slave reads from itself, the master parameters reach it through the master parameters key
+slaveStages = {'beta': PLACEMENT, 'attachToMaster': PLACEMENT, 'fp_master': SOLID | PLACEMENT}
+
+slaveMasterStages = dict(masterStages, hseparator=SOLID, tita=SOLID, buildMode=0, **slaveStages)
@@ -23,8 +23,9 @@
 
 import FreeCAD as App
 
-from numpy import zeros, linalg, array, sin, cos, dot, pi
-from freecad.invgears.gears import inputDataClass, commonData, gearData, mainCalculations, getProfile
+from numpy import zeros, linalg, array, sin, cos, pi, matmul
+from freecad.invgears.gears import inputDataClass, segmentViews
+from freecad.invgears.profileCache import getGears
 
 
 def controlPoints(p, t):
@@ -83,17 +84,14 @@ class GearsInSVG():
         iL = form[2].doubleSpinBox_6.value()
 
         inputData = inputDataClass(m, phi_s, N_m, N_s, Bl, c, deltaCs, deltatp, offset_m, offset_s, n, iL)
-        cD = commonData()
-        master = gearData()
-        slave = gearData()
 
-        
         if form[1].checkBox.isChecked():
-            mainCalculations(inputData, cD, master, slave, True)
-            cD.C = abs(master.Rp - slave.Rp)
+            cD, master, slave = getGears(inputData, True)
+            C = abs(master.Rp - slave.Rp)
             angle = slave.beta0 - pi + pi / N_s
         else:
-            mainCalculations(inputData, cD, master, slave)
+            cD, master, slave = getGears(inputData)
+            C = cD.Center_d
             angle = slave.beta0
 
         if not master.FirstCond:
@@ -117,19 +115,15 @@ class GearsInSVG():
         x = 0
         y = 0
         if form[1].checkBox.isChecked():
-            getProfile(master, slave, cD, True)
             r = master.RTc + form[1].doubleSpinBox_7.value()
             x = r
             y = r
             circle_svg_path = "M{},{} m{},0 a{},{},0,0,1,{},0 a{},{},0,0,1,{},0\n".format(x, y, -r, r, r, 2 * r, r, r, - 2 * r)
         else:
-            getProfile(master, slave, cD)
             x = master.RT
             y = master.RT
             circle_svg_path = ""
 
-        getProfile(slave, master, cD)
-
         ###############################################################
         ##################Master Gear Shape Creation###################
         ###############################################################
@@ -147,9 +141,9 @@ class GearsInSVG():
         ##################Slave Gear Shape Creation####################
         ###############################################################
         index = 1
-        x = x + cD.C
+        x = x + C
         M = array([[cos(angle), -sin(angle)], [sin(angle), cos(angle)]])
-        slave_profile = list(map(lambda x: dot(M, x), slave.profile))
+        slave_profile = segmentViews(matmul(M, slave.profile_array), slave.segments)
         slave_svg_path = "M{},{}".format(slave_profile[0][0, 0] + x, -slave_profile[0][1, 0] + y)
         for profile in slave_profile:
             if index % 3 == 0:
@@ -162,7 +156,7 @@ class GearsInSVG():
             height = 2 * y
             width = height
         else:
-            width = cD.C + master.RT + slave.RT
+            width = C + master.RT + slave.RT
             height = 2 * master.RT
         svg_string = '<?xml version="1.0" standalone="no"?>\n' +\
                     '<svg xmlns="http://www.w3.org/2000/svg"\n' +\